@@ -33,9 +33,12 @@ ARG_PROVINCES = [
 _prov_alt = sorted(ARG_PROVINCES, key=len, reverse=True)
 _prov_pattern = r"(" + "|".join(re.escape(p) for p in _prov_alt) + r")\s*$"
 _PROV_REGEX = re.compile(_prov_pattern, flags=re.IGNORECASE)
+_WS_RE = re.compile(r"\s+")
+_NUMERO_RE = re.compile(r"\d+[A-Za-z]?")
+_INDICIO_DOMICILIO_RE = re.compile(r"\b(\d+|Av\.?|Avenida|Calle|Ruta|RN|RP)\b", flags=re.IGNORECASE)
 
 def _smart_strip(s: str) -> str:
-    return re.sub(r"\s+", " ", (s or "").strip())
+    return _WS_RE.sub(" ", (s or "").strip())
 
 def _extract_province(s: str):
     m = _PROV_REGEX.search(s or "")
@@ -57,7 +60,7 @@ def _split_domicilio_localidad(rest: str):
 
     last_num_idx = None
     for i, tok in enumerate(tokens):
-        if re.fullmatch(r"\d+[A-Za-z]?", tok):
+        if _NUMERO_RE.fullmatch(tok):
             last_num_idx = i
     if last_num_idx is not None and last_num_idx < len(tokens) - 1:
         domicilio = " ".join(tokens[: last_num_idx + 1])
@@ -68,7 +71,7 @@ def _split_domicilio_localidad(rest: str):
         if len(tokens) > k:
             domicilio = " ".join(tokens[:-k])
             localidad = " ".join(tokens[-k:])
-            if re.search(r"\b(\d+|Av\.?|Avenida|Calle|Ruta|RN|RP)\b", domicilio, flags=re.IGNORECASE):
+            if _INDICIO_DOMICILIO_RE.search(domicilio):
                 return _smart_strip(domicilio), _smart_strip(localidad)
 
     domicilio = " ".join(tokens[:-1])
@@ -1,6 +1,20 @@
 from dataclasses import dataclass
 from typing import Optional, List, Dict
 
+# Orden estándar de columnas para construir la hoja
+COLUMNS_ORDER = [
+    "Número de O.T.", "VPE Nº", "Empresa solicitante", "Razón social (Propietario)",
+    "Domicilio (Fiscal)", "Localidad (Fiscal)", "Provincia (Fiscal)",
+    "Lugar propio de instalación - Domicilio", "Lugar propio de instalación - Localidad",
+    "Lugar propio de instalación - Provincia", "Instrumento verificado",
+    "Fabricante receptor", "Marca Receptor", "Modelo Receptor", "N° de serie Receptor",
+    "Cód ap. mod. Receptor", "Origen Receptor", "e", "máx", "mín", "dd=dt", "clase",
+    "N° de Aprobación Modelo (Receptor)", "Fecha de Aprobación Modelo (Receptor)",
+    "Tipo (Indicador)", "Fabricante Indicador", "Marca Indicador", "Modelo Indicador",
+    "N° de serie Indicador", "Código Aprobación (Indicador)", "Origen Indicador",
+    "N° de Aprobación Modelo (Indicador)", "Fecha de Aprobación Modelo (Indicador)"
+]
+
 @dataclass
 class ModeloInstrumento:
     modelo: str
@@ -15,25 +15,15 @@ Ej.: "22/04/1997" -> "22 de abril de 1997"
 
 from __future__ import annotations
 
+import re
 from pathlib import Path
 from typing import Dict, List, Optional
 from datetime import datetime
 
 import pandas as pd
+import xlsxwriter
 
-# Orden estándar de columnas para construir la hoja
-COLUMNS_ORDER = [
-    "Número de O.T.", "VPE Nº", "Empresa solicitante", "Razón social (Propietario)",
-    "Domicilio (Fiscal)", "Localidad (Fiscal)", "Provincia (Fiscal)",
-    "Lugar propio de instalación - Domicilio", "Lugar propio de instalación - Localidad",
-    "Lugar propio de instalación - Provincia", "Instrumento verificado",
-    "Fabricante receptor", "Marca Receptor", "Modelo Receptor", "N° de serie Receptor",
-    "Cód ap. mod. Receptor", "Origen Receptor", "e", "máx", "mín", "dd=dt", "clase",
-    "N° de Aprobación Modelo (Receptor)", "Fecha de Aprobación Modelo (Receptor)",
-    "Tipo (Indicador)", "Fabricante Indicador", "Marca Indicador", "Modelo Indicador",
-    "N° de serie Indicador", "Código Aprobación (Indicador)", "Origen Indicador",
-    "N° de Aprobación Modelo (Indicador)", "Fecha de Aprobación Modelo (Indicador)"
-]
+from src.domain.models import COLUMNS_ORDER
 
 # Campos de fecha a normalizar en castellano
 FIELD_FECHA_RECEPTOR = "Fecha de Aprobación Modelo (Receptor)"
@@ -47,6 +37,8 @@ _MESES = {
     9: "septiembre", 10: "octubre", 11: "noviembre", 12: "diciembre",
 }
 
+_DIGITOS_RE = re.compile(r"\d+")
+
 def _es_formato_castellano(s: str) -> bool:
     """Detecta si ya está en formato '22 de abril de 1997'."""
     return " de " in s and any(m in s.lower() for m in _MESES.values())
@@ -84,8 +76,7 @@ def _parse_date(value: str) -> Optional[datetime]:
             continue
 
     # Intento flexible: normalizar separadores a "/"
-    import re
-    dig = re.findall(r"\d+", value)
+    dig = _DIGITOS_RE.findall(value)
     # Esperamos 3 grupos: d, m, Y
     if len(dig) == 3:
         d, m, y = dig
@@ -125,11 +116,13 @@ def armar_hoja_verificacion_2columnas(filas: List[Dict[str, str]]) -> pd.DataFra
     if not filas:
         return pd.DataFrame(columns=["Campo", "Valor"])
 
-    data_final: List[Dict[str, str]] = []
+    # Una lista por columna: sin un dict {"Campo", "Valor"} por celda
+    campos: List[str] = []
+    valores: List[object] = []
     for idx, fila in enumerate(filas, start=1):
         if idx > 1:
-            data_final.append({"Campo": "", "Valor": ""})
-            data_final.append({"Campo": f"=== INSTRUMENTO {idx} ===", "Valor": ""})
+            campos += ["", f"=== INSTRUMENTO {idx} ==="]
+            valores += ["", ""]
 
         for col in COLUMNS_ORDER:
             val = fila.get(col, "")
@@ -138,9 +131,10 @@ def armar_hoja_verificacion_2columnas(filas: List[Dict[str, str]]) -> pd.DataFra
             if col in DATE_FIELDS:
                 val = _fecha_castellano(str(val))
 
-            data_final.append({"Campo": col, "Valor": val})
+            campos.append(col)
+            valores.append(val)
 
-    return pd.DataFrame(data_final)
+    return pd.DataFrame({"Campo": campos, "Valor": valores})
 
 def exportar_verificacion_2columnas(df: pd.DataFrame, ruta: Path) -> Path:
     """
@@ -150,10 +144,11 @@ def exportar_verificacion_2columnas(df: pd.DataFrame, ruta: Path) -> Path:
     ruta = Path(ruta)
     ruta.parent.mkdir(parents=True, exist_ok=True)
 
-    with pd.ExcelWriter(ruta, engine="xlsxwriter") as writer:
-        df.to_excel(writer, sheet_name="Verificación", index=False)
-        wb = writer.book
-        ws = writer.sheets["Verificación"]
+    # xlsxwriter directo en modo constant_memory: cada fila se escribe una sola vez
+    # y se vuelca a disco al pasar a la siguiente (sin to_excel + reescritura).
+    wb = xlsxwriter.Workbook(str(ruta), {"constant_memory": True})
+    try:
+        ws = wb.add_worksheet("Verificación")
 
         fmt_header = wb.add_format(
             {"bold": True, "bg_color": "#4472C4", "font_color": "white", "border": 1,
@@ -167,20 +162,26 @@ def exportar_verificacion_2columnas(df: pd.DataFrame, ruta: Path) -> Path:
         fmt_sep = wb.add_format({"bold": True, "bg_color": "#FFC000", "font_color": "#000000",
                                  "border": 1, "align": "center", "valign": "vcenter"})
 
+        # Ajustes de presentación (antes de escribir: en constant_memory las filas
+        # ya volcadas no se pueden modificar)
+        ws.set_column(0, 0, 45)  # Campo
+        ws.set_column(1, 1, 60)  # Valor
+        ws.freeze_panes(1, 0)
+        ws.set_row(0, 25)
+
         # Encabezados
-        ws.write(0, 0, "Campo", fmt_header)
-        ws.write(0, 1, "Valor", fmt_header)
+        ws.write_string(0, 0, "Campo", fmt_header)
+        ws.write_string(0, 1, "Valor", fmt_header)
 
         # Cuerpo
-        for row_num in range(1, len(df) + 1):
-            campo = df.iloc[row_num - 1, 0]
-            valor = df.iloc[row_num - 1, 1]
-
+        campos = df.iloc[:, 0].to_numpy() if len(df.columns) > 0 else []
+        valores = df.iloc[:, 1].to_numpy() if len(df.columns) > 1 else [""] * len(df)
+        for row_num, (campo, valor) in enumerate(zip(campos, valores), start=1):
             # Aseguramos string seguro para Excel (evitar fórmulas accidentales)
             campo_str = "" if campo is None else str(campo)
             valor_str = "" if valor is None else str(valor)
 
-            if isinstance(campo_str, str) and campo_str.startswith("==="):
+            if campo_str.startswith("==="):
                 # Separador entre instrumentos: escribir como TEXTO (no fórmula)
                 ws.write_string(row_num, 0, campo_str, fmt_sep)
                 ws.write_string(row_num, 1, valor_str, fmt_sep)
@@ -191,12 +192,7 @@ def exportar_verificacion_2columnas(df: pd.DataFrame, ruta: Path) -> Path:
                 # Campo/Valor normales: siempre como string para evitar fórmulas
                 ws.write_string(row_num, 0, campo_str, fmt_campo)
                 ws.write_string(row_num, 1, valor_str, fmt_valor)
-
-
-        # Ajustes de presentación
-        ws.set_column(0, 0, 45)  # Campo
-        ws.set_column(1, 1, 60)  # Valor
-        ws.freeze_panes(1, 0)
-        ws.set_row(0, 25)
+    finally:
+        wb.close()
 
     return ruta
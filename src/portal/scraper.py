@@ -10,72 +10,298 @@ Requisitos:
 
 from __future__ import annotations
 
+import hashlib
+import hmac
+import json
+import os
 import re
 import time
+import unicodedata
 from datetime import datetime
+from functools import lru_cache, partial
+from html.parser import HTMLParser
 from pathlib import Path
-from typing import Callable, Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
 
-from playwright.sync_api import BrowserContext, Page, sync_playwright
+from playwright.sync_api import (
+    Browser,
+    BrowserContext,
+    Page,
+    Playwright,
+    Route,
+    TimeoutError as PlaywrightTimeoutError,
+    sync_playwright,
+)
+
+from src.domain.models import COLUMNS_ORDER
 
 BASE = "https://app.inti.gob.ar"
 
+# Recursos que no aportan nada al scraping (sólo leemos formularios y tablas).
+# Las hojas de estilo se mantienen para no alterar la visibilidad de los botones.
+RECURSOS_BLOQUEADOS = frozenset({"image", "font", "media"})
+# Analítica / publicidad de terceros: nunca hace falta para leer MetroWeb
+HOSTS_BLOQUEADOS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "hotjar.com",
+    "facebook.net",
+)
+# Flags de Chromium para leer tablas: sin decodificar imágenes ni depender de
+# /dev/shm (chico en contenedores). El sandbox se deja activo.
+ARGS_CHROMIUM = (
+    "--blink-settings=imagesEnabled=false",
+    "--disable-dev-shm-usage",
+)
+
 # ------------------------------------------------------------------------------
 # Helpers de texto / extracción de celdas
 # ------------------------------------------------------------------------------
 
+# Patrones usados en cada celda / página: compilados una sola vez
+_WS_RE = re.compile(r"\s+")
+_NO_DIGITOS_RE = re.compile(r"\D+")
+# Los ceros a la izquierda quedan en el grupo (igual que el antiguo "0*?", que no
+# consumía nada): sin cuantificadores ambiguos entre "vpe" y los dígitos
+_VPE_RE = re.compile(r"vpe\s*(\d+)", re.IGNORECASE)
+_ID_INSTRUMENTO_RE = re.compile(r"idInstrumento=(\d+)")
+_DOM_SPLIT_RE = re.compile(r"[\r\n]+")
+_CHARSET_RE = re.compile(rb"charset=[\"']?([\w-]+)", re.IGNORECASE)
+
 def _clean_one_line(s: str) -> str:
     s = (s or "").replace("\xa0", " ").strip()
-    return re.sub(r"\s+", " ", s)
+    return _WS_RE.sub(" ", s)
 
 def only_digits(s: str) -> str:
-    return "".join(ch for ch in (s or "") if ch.isdigit())
+    return _NO_DIGITOS_RE.sub("", s or "")
+
+@lru_cache(maxsize=4096)
+def _norm(s: str) -> str:
+    """Forma canónica de una etiqueta: sin acentos, en minúsculas y con espacios colapsados."""
+    # "N°" (grado) y "Nº" (ordinal) se escriben indistintamente en el portal
+    s = unicodedata.normalize("NFKD", (s or "").replace("°", "º"))
+    s = s.encode("ascii", "ignore").decode()
+    return " ".join(s.lower().split())
+
+def _formatear_celda(txt: str, keep_newlines: bool) -> str:
+    if keep_newlines:
+        txt = txt.replace("\r", "\n")
+        lines = [ln.strip() for ln in txt.split("\n") if ln.strip()]
+        return "\n".join(lines)
+    return _clean_one_line(txt)
+
+# ------------------------------------------------------------------------------
+# Índice de celdas a partir de un único snapshot HTML
+# ------------------------------------------------------------------------------
+
+# Etiquetas que el navegador renderiza como salto de línea en innerText
+_TAGS_BLOQUE = {"p", "div", "tr", "table", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6"}
+_TAGS_VACIOS = {"br", "img", "input", "meta", "link", "hr", "col", "area", "base", "wbr"}
+_TAGS_IGNORADOS = {"script", "style", "noscript"}
+
+class _TdParser(HTMLParser):
+    """
+    Recorre el HTML una sola vez y arma, en orden de documento, los pares
+    (texto de la TD, texto de la TD hermana siguiente) — lo mismo que resolvía
+    el XPath //td[...]/following-sibling::td[1] — más los href de los enlaces.
+    """
 
-def td_value(page: Page, label: str, keep_newlines: bool = False, nth: int = 0) -> str:
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self._pila: List[Tuple[str, int]] = []     # (tag, id del nodo)
+        self._hijos: Dict[int, List[Tuple[str, int]]] = {0: []}
+        self._tags: Dict[int, str] = {}
+        self._textos: Dict[int, List[str]] = {}     # id de TD/TH -> fragmentos
+        self._abiertas: List[int] = []              # TD/TH abiertas (anidadas)
+        self._ignorar = 0
+        self._next_id = 1
+        self._celdas: List[int] = []
+        self.enlaces: List[str] = []
+
+    # --- estructura ---
+    def _padre(self) -> int:
+        return self._pila[-1][1] if self._pila else 0
+
+    def _cerrar_hasta(self, tags: set, limites: set) -> None:
+        """
+        Cierra implícitamente el elemento abierto más interno de 'tags' y todo lo
+        que quedó abierto adentro (HTML legado: <td><font>Marca<td>...), como hace
+        el navegador. No sube más allá de un elemento de 'limites' (tabla anidada).
+        """
+        for i in range(len(self._pila) - 1, -1, -1):
+            tag = self._pila[i][0]
+            if tag in limites:
+                return
+            if tag in tags:
+                while len(self._pila) > i:
+                    self._pop()
+                return
+
+    def _pop(self) -> None:
+        tag, nodo = self._pila.pop()
+        if self._abiertas and self._abiertas[-1] == nodo:
+            self._abiertas.pop()
+        if tag in _TAGS_BLOQUE:
+            self._texto("\n")
+
+    def _texto(self, txt: str) -> None:
+        for nodo in self._abiertas:
+            self._textos[nodo].append(txt)
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag in _TAGS_IGNORADOS:
+            self._ignorar += 1
+            return
+        if tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self.enlaces.append(href)
+        if tag == "br":
+            self._texto("\n")
+        if tag in _TAGS_VACIOS:
+            return
+        if tag in ("td", "th"):
+            self._cerrar_hasta({"td", "th"}, {"tr", "table"})
+        elif tag == "tr":
+            self._cerrar_hasta({"tr"}, {"table"})
+        nodo = self._next_id
+        self._next_id += 1
+        self._hijos.setdefault(self._padre(), []).append((tag, nodo))
+        self._tags[nodo] = tag
+        self._pila.append((tag, nodo))
+        if tag in _TAGS_BLOQUE:
+            self._texto("\n")
+        if tag in ("td", "th"):
+            self._textos[nodo] = []
+            self._abiertas.append(nodo)
+            self._celdas.append(nodo)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _TAGS_IGNORADOS:
+            self._ignorar = max(0, self._ignorar - 1)
+            return
+        if not any(t == tag for t, _ in self._pila):
+            return
+        while self._pila:
+            t, _ = self._pila[-1]
+            self._pop()
+            if t == tag:
+                break
+
+    def handle_data(self, data: str) -> None:
+        if self._ignorar or not self._abiertas:
+            return
+        # Igual que el render: los espacios/saltos del fuente colapsan a uno
+        self._texto(_WS_RE.sub(" ", data))
+
+    # --- resultado ---
+    def pares(self) -> List[Tuple[str, str]]:
+        siguiente: Dict[int, int] = {}
+        for hijos in self._hijos.values():
+            ultima_td: Optional[int] = None
+            for tag, nodo in reversed(hijos):
+                if ultima_td is not None:
+                    siguiente[nodo] = ultima_td
+                if tag == "td":
+                    ultima_td = nodo
+        out: List[Tuple[str, str]] = []
+        for nodo in self._celdas:
+            sig = siguiente.get(nodo)
+            if sig is None or self._tags[nodo] != "td":
+                continue
+            out.append(("".join(self._textos[nodo]), "".join(self._textos[sig])))
+        return out
+
+class IndiceTd:
+    """
+    Snapshot de una página: pares etiqueta→valor de todas las TD y los href.
+    Permite resolver td_value/td_values/td_value_any sin volver al navegador.
+    """
+
+    def __init__(self, pares: List[Tuple[str, str]], enlaces: List[str]) -> None:
+        # Las etiquetas se comparan normalizadas (sin acentos ni mayúsculas)
+        self.pares = [(_norm(k), v) for k, v in pares]
+        self.enlaces = enlaces
+        self._por_etiqueta: Dict[str, List[str]] = {}
+
+    def _crudos(self, label: str) -> List[str]:
+        # Misma semántica que //td[contains(., label)]: todas las coincidencias por
+        # subcadena, en orden de documento. Se recorre la tabla una vez por etiqueta.
+        clave = _norm(label)
+        crudos = self._por_etiqueta.get(clave)
+        if crudos is None:
+            crudos = [v for k, v in self.pares if clave in k]
+            self._por_etiqueta[clave] = crudos
+        return crudos
+
+    def valores(self, label: str, keep_newlines: bool = False) -> List[str]:
+        return [_formatear_celda(v, keep_newlines) for v in self._crudos(label)]
+
+    def valor(self, label: str, keep_newlines: bool = False, nth: int = 0) -> str:
+        crudos = self._crudos(label)
+        return _formatear_celda(crudos[nth], keep_newlines) if nth < len(crudos) else ""
+
+def indexar_tds(html: str) -> IndiceTd:
+    """Parsea el HTML de una página (p. ej. page.content()) y devuelve su IndiceTd."""
+    parser = _TdParser()
+    try:
+        parser.feed(html or "")
+        parser.close()
+    except Exception:
+        pass
+    return IndiceTd(parser.pares(), parser.enlaces)
+
+def indexar_pagina(page: Page) -> IndiceTd:
+    """Toma un único snapshot de la página (una llamada CDP) y lo indexa."""
+    try:
+        return indexar_tds(page.content())
+    except Exception:
+        return IndiceTd([], [])
+
+FuenteTd = Union[Page, IndiceTd]
+
+@lru_cache(maxsize=512)
+def _xpath_td_siguiente(label: str, nth: Optional[int] = None) -> str:
+    """Selector XPath (cacheado) de la TD que sigue a la TD que contiene 'label'."""
+    xpath = f"//td[contains(normalize-space(.), '{label}')]/following-sibling::td[1]"
+    if nth is None:
+        return f"xpath={xpath}"
+    return f"xpath=({xpath})[{nth + 1}]"
+
+def td_value(page: FuenteTd, label: str, keep_newlines: bool = False, nth: int = 0) -> str:
     """
     Devuelve el texto de la TD siguiente a la TD que contiene 'label'.
     Si existen varias coincidencias, usa el índice 'nth'.
+    Acepta una Page o un IndiceTd (snapshot ya tomado, sin llamadas CDP).
     """
-    loc = page.locator(
-        f"xpath=(//td[contains(normalize-space(.), '{label}')]/following-sibling::td[1])[{nth+1}]"
-    )
+    if isinstance(page, IndiceTd):
+        return page.valor(label, keep_newlines=keep_newlines, nth=nth)
+    loc = page.locator(_xpath_td_siguiente(label, nth))
     try:
-        if loc and loc.count():
-            txt = loc.inner_text(timeout=10_000)
-            if keep_newlines:
-                txt = txt.replace("\r", "\n")
-                lines = [ln.strip() for ln in txt.split("\n") if ln.strip()]
-                return "\n".join(lines)
-            return _clean_one_line(txt)
+        textos = loc.all_inner_texts()
     except Exception:
-        pass
-    return ""
+        return ""
+    return _formatear_celda(textos[0], keep_newlines) if textos else ""
 
-def td_values(page: Page, label: str, keep_newlines: bool = False) -> List[str]:
+def td_values(page: FuenteTd, label: str, keep_newlines: bool = False) -> List[str]:
     """
     Devuelve todas las celdas TD (sibling inmediato) que siguen a una TD que contenga 'label'.
     """
-    loc = page.locator(
-        f"xpath=//td[contains(normalize-space(.), '{label}')]/following-sibling::td[1]"
-    )
-    out: List[str] = []
+    if isinstance(page, IndiceTd):
+        return page.valores(label, keep_newlines=keep_newlines)
+    loc = page.locator(_xpath_td_siguiente(label))
+    # Un único viaje al navegador para todas las filas (antes: count() + inner_text() por fila)
     try:
-        n = loc.count()
-        for i in range(n):
-            txt = loc.nth(i).inner_text(timeout=10_000)
-            if keep_newlines:
-                txt = txt.replace("\r", "\n")
-                lines = [ln.strip() for ln in txt.split("\n") if ln.strip()]
-                out.append("\n".join(lines))
-            else:
-                out.append(_clean_one_line(txt))
+        textos = loc.all_inner_texts()
     except Exception:
-        pass
-    return out
+        return []
+    return [_formatear_celda(txt, keep_newlines) for txt in textos]
 
-def td_value_any(page: Page, labels: List[str], keep_newlines: bool = False) -> str:
+def td_value_any(page: FuenteTd, labels: Sequence[str], keep_newlines: bool = False) -> str:
     """
     Prueba varias etiquetas alternativas y devuelve el primer valor no vacío.
+    Corta en la primera coincidencia: las etiquetas van de la más probable a la menos.
     """
     for lb in labels:
         v = td_value(page, lb, keep_newlines=keep_newlines)
@@ -83,22 +309,205 @@ def td_value_any(page: Page, labels: List[str], keep_newlines: bool = False) ->
             return v
     return ""
 
+def td_values_any(page: FuenteTd, labels: Sequence[str], keep_newlines: bool = False) -> List[str]:
+    """
+    Como td_values, pero con etiquetas alternativas: devuelve la primera lista no vacía.
+    """
+    for lb in labels:
+        vals = td_values(page, lb, keep_newlines=keep_newlines)
+        if vals:
+            return vals
+    return []
+
 def split_domicilio(block_text: str) -> Tuple[str, str, str]:
     """
     Divide un bloque multilinea en (domicilio, localidad, provincia).
     """
     if not block_text:
         return "", "", ""
-    parts = [p.strip() for p in block_text.replace("\r", "\n").split("\n") if p.strip()]
-    dom = parts[0] if len(parts) > 0 else ""
-    loc = parts[1] if len(parts) > 1 else ""
-    prov = parts[2] if len(parts) > 2 else ""
-    return dom, loc, prov
+    parts = [p for p in map(str.strip, _DOM_SPLIT_RE.split(block_text)) if p] + ["", "", ""]
+    return parts[0], parts[1], parts[2]
+
+# ------------------------------------------------------------------------------
+# Etiquetas del portal
+# ------------------------------------------------------------------------------
+
+# Variantes por campo, de la más probable a la menos probable. Es copia fiel de
+# selectors.yaml (pages.*): al agregar una variante, hacerlo en ambos lados;
+# tests/test_integration_playwright.py verifica que coincidan.
+ETIQUETAS: Dict[str, Tuple[str, ...]] = {
+    "resumen.ot": (
+        "Nro OT",
+        "N° OT",
+        "Número de O.T.",
+        "Numero de O.T.",
+        "Número OT",
+        "Nmero OT",
+    ),
+    "resumen.vpe_inline": ("Número:", "Numero:", "N°:"),
+    "resumen.empresa_solicitante": ("Empresa Solicitante", "Solicitante"),
+    "resumen.usuario_representado": ("Usuario Representado", "Usuario representado"),
+    "detalle.nombre_usuario_instr": (
+        "Nombre del Usuario del Instrumento",
+        "Nombre del Usuario del instrumento",
+        "Nombre del Usuario del equipo",
+        "Nombre del Usuario",
+    ),
+    "detalle.direccion_legal": (
+        "Dirección Legal",
+        "Dirección legal",
+        "Direccion Legal",
+        "Direccion legal",
+    ),
+    "instrumento.domicilio": ("Domicilio", "Dirección de Instalación"),
+    "instrumento.codigo_aprobacion": (
+        "Código de Aprobación de Modelo",
+        "Código de Aprobación",
+        "Codigo de Aprobación",
+        "Codigo de Aprobacion",
+    ),
+    "instrumento.nro_serie": ("Nro de serie", "N° de serie", "Número de serie"),
+    "modelo.modelo": ("Modelo Aprobado", "Modelo"),
+    "modelo.fabricante": ("Fabricante/Importador", "Fabricante", "Importador"),
+    "modelo.marca": ("Marca",),
+    "modelo.origen": ("País Origen", "País de Origen", "País  Origen", "Origen"),
+    "modelo.n_aprob": (
+        "Nº Disposicion",
+        "N° Disposicion",
+        "Nº Disposición",
+        "N° Disposición",
+        "Nº Disposici",
+        "N° Disposici",
+        "N° de Aprobación",
+        "Nº de Aprobación",
+        "Nº Disp",
+        "N° Disp",
+    ),
+    "modelo.fecha_aprob": ("Fecha Aprobación", "Fecha de Aprobación"),
+    "modelo.tipo_instr": ("Tipo Instrumento", "Tipo de Instrumento"),
+    "modelo.max": ("Máximo", "Capacidad Máx.", "Capacidad máxima"),
+    "modelo.min": ("Mínimo", "Capacidad Mín.", "Capacidad mínima"),
+    "modelo.e": ("e",),
+    "modelo.dd_dt": ("dd=dt", "dt", "dd", "d"),
+    "modelo.clase": ("Clase",),
+    "modelo.codigo_aprobacion": ("Código Aprobación", "Codigo Aprobación", "Codigo Aprobacion"),
+}
+
+# Las mismas variantes normalizadas una sola vez al importar el módulo. Las que
+# sólo difieren en acentos/mayúsculas colapsan en una única búsqueda.
+# Sólo sirven para IndiceTd: el XPath de td_value(Page, ...) compara texto crudo.
+_LABEL_ALIASES: Dict[str, Tuple[str, ...]] = {
+    campo: tuple(dict.fromkeys(_norm(v) for v in variantes))
+    for campo, variantes in ETIQUETAS.items()
+}
 
 # ------------------------------------------------------------------------------
 # Navegación MetroWeb
 # ------------------------------------------------------------------------------
 
+def hrefs_absolutos(page: FuenteTd, selector: str, contiene: str) -> List[str]:
+    """
+    Devuelve los href de todos los enlaces que coinciden con 'selector'.
+    Se leen en una sola llamada al navegador (en lugar de .nth(i) por enlace),
+    se filtran por 'contiene' y se completan con BASE si son relativos.
+    Con un IndiceTd se usan los enlaces del snapshot (sin llamadas CDP).
+    """
+    if isinstance(page, IndiceTd):
+        hrefs: List[Optional[str]] = list(page.enlaces)
+    else:
+        hrefs = page.eval_on_selector_all(
+            selector, "els => els.map(e => e.getAttribute('href'))"
+        )
+    out: List[str] = []
+    for href in hrefs:
+        href = href or ""
+        if contiene in href:
+            out.append(href if href.startswith("http") else BASE + href)
+    return out
+
+def esperar_tablas(page: Page, timeout: int = 10_000) -> None:
+    """
+    Espera a que la página tenga al menos una tabla en el DOM antes de leerla.
+    Reemplaza a los sleep fijos: si la tabla ya está, no se espera nada.
+    """
+    try:
+        page.locator("table").first.wait_for(state="attached", timeout=timeout)
+    except Exception:
+        pass
+
+def abrir_para_leer(page: Page, url: str) -> None:
+    """
+    Navega a una página de solo lectura y espera lo justo para leerla.
+    Los datos vienen en el HTML inicial: alcanza con DOMContentLoaded y la tabla,
+    sin esperar a 'load' ni a 'networkidle' (≥500 ms de red quieta por página).
+    """
+    page.goto(url, wait_until="domcontentloaded")
+    esperar_tablas(page)
+
+def selectores_presentes(page: Page, selectores: Sequence[str]) -> Set[str]:
+    """
+    Devuelve cuáles de los selectores CSS existen en la página, en una sola
+    llamada al navegador (en lugar de un locator(...).count() por alternativa).
+    """
+    return set(
+        page.evaluate(
+            "sels => sels.filter(s => document.querySelector(s) !== null)",
+            list(selectores),
+        )
+    )
+
+def enviar_y_esperar(
+    page: Page,
+    accion: Callable[[], None],
+    error: str,
+    selector: Optional[str] = None,
+    url: Optional[Callable[[str], bool]] = None,
+    navegacion: bool = False,
+    timeout: int = 30_000,
+) -> None:
+    """
+    Ejecuta un clic/submit y espera la señal concreta que necesita el paso
+    siguiente (el 'selector' en el DOM, una 'url' que cumpla el predicado o,
+    con navegacion=True, la carga de la página que dispara la acción), en
+    lugar de 'networkidle'. Si no llega a tiempo lanza RuntimeError(error).
+    """
+    try:
+        if navegacion:
+            with page.expect_navigation(wait_until="domcontentloaded", timeout=timeout):
+                accion()
+            return
+        accion()
+        if selector is not None:
+            page.wait_for_selector(selector, state="attached", timeout=timeout)
+        elif url is not None:
+            page.wait_for_url(url, wait_until="domcontentloaded", timeout=timeout)
+    except PlaywrightTimeoutError as e:
+        raise RuntimeError(error) from e
+
+def indexar_url(
+    context: BrowserContext, url: str, page: Optional[Page] = None
+) -> IndiceTd:
+    """
+    Abre 'url' y devuelve su snapshot indexado. Con 'page' se reutiliza esa
+    pestaña (sin crear ni cerrar targets CDP); si no, se usa una temporal.
+    """
+    propia = page is None
+    if page is None:
+        page = context.new_page()
+        page.set_default_timeout(60_000)
+    try:
+        abrir_para_leer(page, url)
+        return indexar_pagina(page)
+    finally:
+        if propia:
+            try:
+                page.close()
+            except Exception:
+                pass
+
+class SesionVencidaError(RuntimeError):
+    """MetroWeb redirigió al login: las cookies de la sesión ya no son válidas."""
+
 def login_y_abrir_ot(
     context: BrowserContext,
     usuario: str,
@@ -108,50 +517,94 @@ def login_y_abrir_ot(
 ) -> Tuple[Page, Dict[str, str], List[str]]:
     page = context.new_page()
     page.set_default_timeout(60_000)
+    iniciar_sesion(page, usuario, password, log_callback)
+    meta, instrument_links = abrir_ot(page, ot, log_callback)
+    return page, meta, instrument_links
 
+# Alternativas de los formularios de MetroWeb, consultadas de una sola vez
+_SELECTORES_INGRESO: Tuple[str, ...] = (
+    'input[name="usuario"]',
+    'input[id="usuario"]',
+    'input[name="contrasena"]',
+    'input[name="password"]',
+    'input[value="Ingresar"]',
+    'input[type="submit"]',
+)
+_SELECTORES_BUSQUEDA: Tuple[str, ...] = (
+    'input[name="numeroOT"]',
+    'input[name="nroOT"]',
+    'input[value="Buscar"]',
+)
+
+def iniciar_sesion(
+    page: Page,
+    usuario: str,
+    password: str,
+    log_callback: Optional[Callable[[str], None]] = None,
+) -> None:
     if log_callback:
         log_callback("🔗 Conectando con MetroWeb...")
 
     page.goto(f"{BASE}/MetroWeb/pages/ingreso.jsp")
+    presentes = selectores_presentes(page, _SELECTORES_INGRESO)
 
     # Usuario
-    if page.locator('input[name="usuario"]').count():
+    if 'input[name="usuario"]' in presentes:
         page.fill('input[name="usuario"]', usuario)
-    elif page.locator('input[id="usuario"]').count():
+    elif 'input[id="usuario"]' in presentes:
         page.fill('input[id="usuario"]', usuario)
     else:
         page.fill('xpath=(//input[@type="text"])[1]', usuario)
 
     # Password
-    if page.locator('input[name="contrasena"]').count():
+    if 'input[name="contrasena"]' in presentes:
         page.fill('input[name="contrasena"]', password)
-    elif page.locator('input[name="password"]').count():
+    elif 'input[name="password"]' in presentes:
         page.fill('input[name="password"]', password)
     else:
         page.fill('xpath=(//input[@type="password"])[1]', password)
 
-    # Enviar
-    if page.locator('input[value="Ingresar"]').count():
-        page.click('input[value="Ingresar"]')
-    elif page.locator('input[type="submit"]').count():
-        page.click('input[type="submit"]')
-    else:
-        page.keyboard.press("Enter")
-
     if log_callback:
         log_callback("🔐 Autenticando credenciales...")
 
-    page.wait_for_load_state("networkidle")
+    # Enviar: el login terminó cuando MetroWeb sale de ingreso.jsp (con
+    # credenciales inválidas vuelve a mostrar el formulario de ingreso)
+    if 'input[value="Ingresar"]' in presentes:
+        enviar = partial(page.click, 'input[value="Ingresar"]')
+    elif 'input[type="submit"]' in presentes:
+        enviar = partial(page.click, 'input[type="submit"]')
+    else:
+        enviar = partial(page.keyboard.press, "Enter")
+    enviar_y_esperar(
+        page,
+        enviar,
+        "No se pudo iniciar sesión en MetroWeb: revisar usuario y contraseña",
+        url=lambda u: "ingreso" not in u,
+    )
 
     if log_callback:
         log_callback("✅ Sesión iniciada correctamente")
+
+def abrir_ot(
+    page: Page,
+    ot: str,
+    log_callback: Optional[Callable[[str], None]] = None,
+) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Busca la OT con una sesión ya iniciada y devuelve (meta, enlaces de instrumentos).
+    Lanza SesionVencidaError si MetroWeb redirige al ingreso.
+    """
+    if log_callback:
         log_callback(f"🔍 Buscando OT: {ot}")
 
     page.goto(f"{BASE}/MetroWeb/entrarPML.do")
+    if "ingreso" in page.url:
+        raise SesionVencidaError("La sesión de MetroWeb expiró")
 
-    if page.locator('input[name="numeroOT"]').count():
+    presentes = selectores_presentes(page, _SELECTORES_BUSQUEDA)
+    if 'input[name="numeroOT"]' in presentes:
         page.fill('input[name="numeroOT"]', ot)
-    elif page.locator('input[name="nroOT"]').count():
+    elif 'input[name="nroOT"]' in presentes:
         page.fill('input[name="nroOT"]', ot)
     else:
         caja = page.locator(
@@ -159,14 +612,21 @@ def login_y_abrir_ot(
         )
         caja.fill(ot)
 
-    if page.locator('input[value="Buscar"]').count():
-        page.click('input[value="Buscar"]')
+    if 'input[value="Buscar"]' in presentes:
+        buscar = partial(page.click, 'input[value="Buscar"]')
     else:
-        page.keyboard.press("Enter")
-    page.wait_for_load_state("networkidle")
+        buscar = partial(page.keyboard.press, "Enter")
+    # La búsqueda recarga la página: con el resultado ya cargado, una OT
+    # inexistente se detecta al instante por la falta del enlace
+    enviar_y_esperar(
+        page,
+        buscar,
+        "MetroWeb no respondió a la búsqueda de la OT",
+        navegacion=True,
+    )
 
     link_vpe = page.locator('a[href*="tramiteVPE"]').first
-    if not link_vpe or not link_vpe.count():
+    if link_vpe.count() == 0:
         raise RuntimeError("No se encontró enlace de trámite VPE para esa OT")
 
     vpe_text = _clean_one_line(link_vpe.inner_text())
@@ -175,34 +635,47 @@ def login_y_abrir_ot(
     if log_callback:
         log_callback(f"✅ VPE encontrado: {vpe_num}")
 
-    link_vpe.click()
-    page.wait_for_load_state("networkidle")
+    # El clic fija el trámite en la sesión del servidor: se espera a que cargue su página
+    enviar_y_esperar(
+        page,
+        link_vpe.click,
+        "MetroWeb no abrió el trámite VPE",
+        url=lambda u: "tramiteVPE" in u,
+    )
 
     if log_callback:
         log_callback("📄 Accediendo a datos del trámite...")
 
-    page.goto(f"{BASE}/MetroWeb/pages/tramiteVPE/resumen.jsp")
-    page.wait_for_load_state("networkidle")
-    time.sleep(0.5)
+    abrir_para_leer(page, f"{BASE}/MetroWeb/pages/tramiteVPE/resumen.jsp")
 
-    meta = leer_resumen(page)
+    # Un único snapshot del resumen sirve para la cabecera y para los enlaces
+    html = _contenido(page)
+    idx = indexar_tds(html)
+    meta = parsear_resumen(html, idx)
     if not meta.get("ot"):
         meta["ot"] = ot
     if not meta.get("vpe"):
         meta["vpe"] = vpe_num
 
-    instrument_links: List[str] = []
-    enlaces = page.locator('a[href*="instrumentoDetalle.do"]')
-    for i in range(enlaces.count()):
-        href = enlaces.nth(i).get_attribute("href") or ""
-        if "instrumentoDetalle.do" in href:
-            if not href.startswith("http"):
-                href = BASE + href
-            instrument_links.append(href)
+    instrument_links = hrefs_absolutos(
+        idx, 'a[href*="instrumentoDetalle.do"]', "instrumentoDetalle.do"
+    )
 
-    return page, meta, instrument_links
+    return meta, instrument_links
+
+def _contenido(page: Page) -> str:
+    try:
+        return page.content()
+    except Exception:
+        return ""
 
 def leer_resumen(page: Page) -> Dict[str, str]:
+    # Un único snapshot del DOM sirve para todas las etiquetas y la regex del VPE
+    html = _contenido(page)
+    return parsear_resumen(html, indexar_tds(html))
+
+def parsear_resumen(html: str, idx: IndiceTd) -> Dict[str, str]:
+    """Extrae OT, VPE, empresa y usuario representado de resumen.jsp."""
     meta = {
         "ot": "",
         "vpe": "",
@@ -210,131 +683,62 @@ def leer_resumen(page: Page) -> Dict[str, str]:
         "usuario_representado": "",
     }
 
-    ot_val = td_value(page, "Nro OT") or td_value(page, "N° OT") or td_value(page, "Número de O.T.") or ""
+    ot_val = td_value_any(idx, _LABEL_ALIASES["resumen.ot"])
     meta["ot"] = _clean_one_line(ot_val)
 
-    try:
-        html = page.content()
-        m = re.search(r"vpe\s*0*?(\d+)", html, re.IGNORECASE)
-        if m:
-            meta["vpe"] = m.group(1)
-    except Exception:
-        pass
+    m = _VPE_RE.search(html)
+    if m:
+        meta["vpe"] = m.group(1)
     if not meta["vpe"]:
-        vpe_inline = td_value(page, "Número:") or ""
+        vpe_inline = td_value_any(idx, _LABEL_ALIASES["resumen.vpe_inline"])
         meta["vpe"] = only_digits(vpe_inline)
 
-    meta["empresa_solicitante"] = td_value(page, "Empresa Solicitante")
-    meta["usuario_representado"] = td_value(page, "Usuario Representado")
+    meta["empresa_solicitante"] = td_value_any(idx, _LABEL_ALIASES["resumen.empresa_solicitante"])
+    meta["usuario_representado"] = td_value_any(idx, _LABEL_ALIASES["resumen.usuario_representado"])
 
     return meta
 
-def leer_detalle_vpe(context: BrowserContext) -> Dict[str, str]:
-    datos = {"nombre_usuario_instr": "", "direccion_legal": ""}
-    page = context.new_page()
-    page.set_default_timeout(60_000)
-    try:
-        page.goto(f"{BASE}/MetroWeb/pages/tramiteVPE/detalle.jsp")
-        page.wait_for_load_state("networkidle")
-        time.sleep(0.3)
-
-        datos["nombre_usuario_instr"] = td_value_any(
-            page,
-            [
-                "Nombre del Usuario del Instrumento",
-                "Nombre del Usuario del instrumento",
-                "Nombre del Usuario del equipo",
-                "Nombre del Usuario",
-            ],
-        )
-
-        datos["direccion_legal"] = td_value_any(
-            page,
-            [
-                "Dirección Legal",
-                "Dirección legal",
-                "Direccion Legal",
-                "Direccion legal",
-            ],
-            keep_newlines=False,
-        )
-    finally:
-        try:
-            page.close()
-        except Exception:
-            pass
-    return datos
-
-def leer_modelo_detalle(context: BrowserContext, href: str) -> Dict[str, str]:
-    datos: Dict[str, str] = {
-        "modelo": "",
-        "marca": "",
-        "fabricante": "",
-        "origen": "",
-        "n_aprob": "",
-        "fecha_aprob": "",
-        "tipo_instr": "",
-        "max": "",
-        "min": "",
-        "e": "",
-        "dd_dt": "",
-        "clase": "",
-        "codigo_aprobacion": "",
+def leer_detalle_vpe(context: BrowserContext, page: Optional[Page] = None) -> Dict[str, str]:
+    idx = indexar_url(context, f"{BASE}/MetroWeb/pages/tramiteVPE/detalle.jsp", page)
+    return {
+        "nombre_usuario_instr": td_value_any(idx, _LABEL_ALIASES["detalle.nombre_usuario_instr"]),
+        "direccion_legal": td_value_any(
+            idx, _LABEL_ALIASES["detalle.direccion_legal"], keep_newlines=False
+        ),
     }
 
-    if not href:
-        return datos
+_CAMPOS_MODELO: Tuple[str, ...] = (
+    "modelo", "fabricante", "marca", "origen", "n_aprob", "fecha_aprob",
+    "tipo_instr", "max", "min", "e", "dd_dt", "clase", "codigo_aprobacion",
+)
 
-    page = context.new_page()
-    page.set_default_timeout(60_000)
-
-    try:
-        page.goto(href)
-        page.wait_for_load_state("networkidle")
-        time.sleep(0.3)
-
-        datos["modelo"] = td_value_any(page, ["Modelo Aprobado", "Modelo"])
-        datos["fabricante"] = td_value_any(page, ["Fabricante/Importador", "Fabricante", "Importador"])
-        datos["marca"] = td_value(page, "Marca")
-        datos["origen"] = td_value_any(page, ["País Origen", "País de Origen", "País  Origen", "Origen"])
-        datos["n_aprob"] = td_value_any(
-            page,
-            [
-                "Nº Disposicion",
-                "N° Disposicion",
-                "Nº Disposición",
-                "N° Disposición",
-                "Nº Disposici",
-                "N° Disposici",
-                "N° de Aprobación",
-                "Nº de Aprobación",
-            ],
-        )
-        datos["fecha_aprob"] = td_value_any(page, ["Fecha Aprobación", "Fecha de Aprobación"])
-        datos["tipo_instr"] = td_value_any(page, ["Tipo Instrumento", "Tipo de Instrumento"])
-
-        datos["max"] = td_value_any(page, ["Máximo", "Capacidad Máx.", "Capacidad máxima"])
-        datos["min"] = td_value_any(page, ["Mínimo", "Capacidad Mín.", "Capacidad mínima"])
-        datos["e"] = td_value(page, "e")
-        datos["dd_dt"] = td_value_any(page, ["dd=dt", "dt", "dd", "d"])
-        datos["clase"] = td_value(page, "Clase") or "III"
-        datos["codigo_aprobacion"] = td_value_any(
-            page, ["Código Aprobación", "Codigo Aprobación", "Codigo Aprobacion"]
-        )
-    finally:
-        try:
-            page.close()
-        except Exception:
-            pass
+def _modelo_vacio() -> Dict[str, str]:
+    return dict.fromkeys(_CAMPOS_MODELO, "")
 
+def parsear_modelo(idx: IndiceTd) -> Dict[str, str]:
+    """Extrae los datos de modeloDetalle.do de un snapshot ya indexado."""
+    datos = _modelo_vacio()
+    for campo in _CAMPOS_MODELO:
+        datos[campo] = td_value_any(idx, _LABEL_ALIASES[f"modelo.{campo}"])
+    datos["clase"] = datos["clase"] or "III"
     return datos
 
-def leer_instrumento(context: BrowserContext, id_instrumento: str) -> Dict[str, object]:
-    url = f"{BASE}/MetroWeb/instrumentoDetalle.do?idInstrumento={id_instrumento}"
-    page = context.new_page()
-    page.set_default_timeout(60_000)
+def _modelo_sin_datos(datos: Dict[str, str]) -> bool:
+    # "clase" siempre tiene valor (default "III"): no cuenta
+    return not any(v for k, v in datos.items() if k != "clase")
+
+def leer_modelo_detalle(
+    context: BrowserContext, href: str, page: Optional[Page] = None
+) -> Dict[str, str]:
+    if not href:
+        return _modelo_vacio()
+    return parsear_modelo(indexar_url(context, href, page))
+
+def url_instrumento(id_instrumento: str) -> str:
+    return f"{BASE}/MetroWeb/instrumentoDetalle.do?idInstrumento={id_instrumento}"
 
-    data: Dict[str, object] = {
+def _instrumento_vacio() -> Dict[str, object]:
+    return {
         "inst_dom": "",
         "inst_loc": "",
         "inst_prov": "",
@@ -342,196 +746,672 @@ def leer_instrumento(context: BrowserContext, id_instrumento: str) -> Dict[str,
         "indicador": {"href": "", "code": "", "serie": ""},
     }
 
+def parsear_instrumento(idx: IndiceTd) -> Dict[str, object]:
+    """Extrae lugar de instalación, receptor e indicador de instrumentoDetalle.do."""
+    data = _instrumento_vacio()
+
+    dom_block = td_value_any(idx, _LABEL_ALIASES["instrumento.domicilio"], keep_newlines=True)
+    dom, loc, prov = split_domicilio(dom_block)
+    data["inst_dom"], data["inst_loc"], data["inst_prov"] = dom, loc, prov
+
+    hrefs = hrefs_absolutos(idx, "a[href*='modeloDetalle.do']", "modeloDetalle.do")
+
+    codes = td_values_any(idx, _LABEL_ALIASES["instrumento.codigo_aprobacion"])
+    series = td_values_any(idx, _LABEL_ALIASES["instrumento.nro_serie"])
+
+    if len(hrefs) >= 1:
+        data["receptor"]["href"] = hrefs[0]  # type: ignore[index]
+    if len(hrefs) >= 2:
+        data["indicador"]["href"] = hrefs[1]  # type: ignore[index]
+
+    if len(codes) >= 1:
+        data["receptor"]["code"] = codes[0]  # type: ignore[index]
+    if len(codes) >= 2:
+        data["indicador"]["code"] = codes[1]  # type: ignore[index]
+
+    if len(series) >= 1:
+        data["receptor"]["serie"] = series[0]  # type: ignore[index]
+    if len(series) >= 2:
+        data["indicador"]["serie"] = series[1]  # type: ignore[index]
+
+    return data
+
+def _instrumento_sin_datos(data: Dict[str, object]) -> bool:
+    if data.get("inst_dom") or data.get("inst_loc") or data.get("inst_prov"):
+        return False
+    for parte in ("receptor", "indicador"):
+        if any((data.get(parte) or {}).values()):  # type: ignore[union-attr]
+            return False
+    return True
+
+def leer_instrumento(
+    context: BrowserContext, id_instrumento: str, page: Optional[Page] = None
+) -> Dict[str, object]:
+    return parsear_instrumento(indexar_url(context, url_instrumento(id_instrumento), page))
+
+# ------------------------------------------------------------------------------
+# Descargas en paralelo (fetch dentro del navegador)
+# ------------------------------------------------------------------------------
+
+# Páginas de detalle que se piden a la vez (no saturar el servidor de MetroWeb)
+CONCURRENCIA_DESCARGAS = 4
+
+# fetch() corre dentro de la página de MetroWeb: usa las cookies de la sesión.
+# Se decodifica con el charset del Content-Type o del <meta> (las JSP no son UTF-8).
+_JS_DESCARGAR_HTML = """
+async (urls) => {
+  const leer = async (url) => {
+    if (!url) return "";
+    try {
+      const resp = await fetch(url, { credentials: "include" });
+      if (!resp.ok) return "";
+      const buf = await resp.arrayBuffer();
+      const tipo = resp.headers.get("content-type") || "";
+      const cabeza = new TextDecoder("latin1").decode(buf.slice(0, 4096));
+      const m = /charset=["']?([\\w-]+)/i.exec(tipo)
+        || /<meta[^>]+charset=["']?([\\w-]+)/i.exec(cabeza);
+      let dec;
+      try { dec = new TextDecoder(m ? m[1] : "utf-8"); } catch (e) { dec = new TextDecoder("utf-8"); }
+      // Se devuelve el DOM ya normalizado por el parser del navegador (celdas sin
+      // cerrar, tags inline abiertos), igual que si se hubiera navegado la página
+      return new DOMParser().parseFromString(dec.decode(buf), "text/html")
+        .documentElement.outerHTML;
+    } catch (e) {
+      return "";
+    }
+  };
+  return Promise.all(urls.map(leer));
+}
+"""
+
+def descargar_html(page: Page, urls: Sequence[str]) -> List[str]:
+    """
+    Descarga en paralelo el HTML de 'urls' con fetch() desde 'page' (misma sesión).
+    Devuelve "" para las URLs vacías o que fallaron; el llamador decide el fallback.
+    """
+    if not any(urls):
+        return [""] * len(urls)
     try:
-        page.goto(url)
-        page.wait_for_load_state("networkidle")
-        time.sleep(0.3)
-
-        dom_block = td_value(page, "Domicilio", keep_newlines=True)
-        dom, loc, prov = split_domicilio(dom_block)
-        data["inst_dom"], data["inst_loc"], data["inst_prov"] = dom, loc, prov
-
-        links = page.locator("a[href*='modeloDetalle.do']")
-        hrefs: List[str] = []
-        for i in range(links.count()):
-            h = links.nth(i).get_attribute("href") or ""
-            if "modeloDetalle.do" in h:
-                hrefs.append(h if h.startswith("http") else BASE + h)
-
-        codes = td_values(page, "Código de Aprobación de Modelo") or td_values(page, "Código de Aprobación")
-        series = td_values(page, "Nro de serie")
-
-        if len(hrefs) >= 1:
-            data["receptor"]["href"] = hrefs[0]
-        if len(hrefs) >= 2:
-            data["indicador"]["href"] = hrefs[1]
-
-        if len(codes) >= 1:
-            data["receptor"]["code"] = codes[0]
-        if len(codes) >= 2:
-            data["indicador"]["code"] = codes[1]
-
-        if len(series) >= 1:
-            data["receptor"]["serie"] = series[0]
-        if len(series) >= 2:
-            data["indicador"]["serie"] = series[1]
+        htmls = page.evaluate(_JS_DESCARGAR_HTML, list(urls))
+    except Exception:
+        return [""] * len(urls)
+    return [h or "" for h in htmls]
 
-    finally:
+def _decodificar_html(cuerpo: bytes, content_type: str = "") -> str:
+    # Mismo criterio que _JS_DESCARGAR_HTML: charset del Content-Type o del <meta>
+    m = _CHARSET_RE.search(content_type.encode("latin-1", "ignore")) or _CHARSET_RE.search(
+        cuerpo[:4096]
+    )
+    charset = m.group(1).decode("ascii") if m else "utf-8"
+    try:
+        return cuerpo.decode(charset, errors="replace")
+    except LookupError:
+        return cuerpo.decode("utf-8", errors="replace")
+
+_JS_NORMALIZAR_HTML = """
+(texto) => new DOMParser().parseFromString(texto, "text/html").documentElement.outerHTML
+"""
+
+def pedir_html(
+    context: BrowserContext, url: str, page: Optional[Page] = None, timeout: int = 30_000
+) -> str:
+    """
+    GET directo con context.request (mismas cookies, sin abrir página ni renderizar).
+    Se usa cuando el fetch desde la página falló; devuelve "" si tampoco responde.
+    Con 'page', el HTML se normaliza con el parser del navegador (como el fetch).
+    """
+    if not url:
+        return ""
+    try:
+        resp = context.request.get(url, timeout=timeout)
+        if not resp.ok:
+            return ""
+        html = _decodificar_html(resp.body(), resp.headers.get("content-type", ""))
+    except Exception:
+        return ""
+    if page is not None and html:
         try:
-            page.close()
+            html = page.evaluate(_JS_NORMALIZAR_HTML, html)
         except Exception:
             pass
+    return html
 
-    return data
+def _tandas(items: Sequence[str], n: int) -> List[Sequence[str]]:
+    return [items[i : i + n] for i in range(0, len(items), n)]
 
 # ------------------------------------------------------------------------------
-# Punto principal llamado por la GUI
+# Cache de modelos e instrumentos en disco
 # ------------------------------------------------------------------------------
 
-def extraer_camiones_por_ot(
-    ot: str,
-    user: str,
-    pwd: str,
-    mostrar_navegador: bool = False,
-    log_callback: Optional[Callable[[str], None]] = None,
-    progress_callback: Optional[Callable[[int, int], None]] = None,
-) -> List[Dict[str, str]]:
+# Los modelos aprobados casi no cambian: se guardan entre corridas para no volver
+# a pedir modeloDetalle.do en OTs siguientes con las mismas balanzas.
+RUTA_CACHE_MODELOS = Path.home() / ".extract_camiones" / "modelos_cache.json"
+TTL_CACHE_MODELOS_DIAS = 30
+
+# Los instrumentos sí pueden corregirse en el portal (domicilio, nº de serie):
+# la cache está apagada por defecto y sólo se usa para re-ejecutar la misma OT
+# mientras se desarrolla (EXTRACT_CAMIONES_CACHE_INSTRUMENTOS=1). El sufijo _vN
+# es la versión del formato de parsear_instrumento; al cambiarlo se ignora lo viejo.
+RUTA_CACHE_INSTRUMENTOS = Path.home() / ".extract_camiones" / "instrumentos_cache_v1.json"
+TTL_CACHE_INSTRUMENTOS_DIAS = 1
+
+class CacheModelos:
     """
-    Retorna una lista de filas (dict campo->valor) para exportar a Excel.
+    Cache JSON {clave: {"ts": epoch, "datos": {...}}}; la clave es el href de
+    modeloDetalle.do o el idInstrumento, según la instancia.
+    Es best-effort: si el archivo falta, está corrupto o no se puede escribir,
+    se sigue como si no hubiera cache.
     """
-    filas: List[Dict[str, str]] = []
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=not mostrar_navegador, slow_mo=0)
-        context = browser.new_context()
+    def __init__(
+        self,
+        ruta: Optional[Path] = RUTA_CACHE_MODELOS,
+        ttl_dias: float = TTL_CACHE_MODELOS_DIAS,
+    ) -> None:
+        self.ruta = ruta
+        self.ttl_seg = ttl_dias * 86_400
+        self._entradas: Dict[str, Dict[str, object]] = {}
+        self._sucio = False
+        if ruta is not None:
+            try:
+                data = json.loads(ruta.read_text(encoding="utf-8"))
+                if isinstance(data, dict):
+                    self._entradas = data
+            except Exception:
+                pass
+
+    def get(self, href: str) -> Optional[Dict[str, str]]:
+        entrada = self._entradas.get(href)
+        if not isinstance(entrada, dict):
+            return None
+        ts = entrada.get("ts")
+        datos = entrada.get("datos")
+        if not isinstance(ts, (int, float)) or not isinstance(datos, dict):
+            return None
+        if time.time() - ts > self.ttl_seg:
+            return None
+        return dict(datos)
+
+    def set(self, href: str, datos: Dict[str, str]) -> None:
+        self._entradas[href] = {"ts": time.time(), "datos": dict(datos)}
+        self._sucio = True
+
+    def guardar(self) -> None:
+        if not self._sucio or self.ruta is None:
+            return
         try:
-            page, meta, instrument_links = login_y_abrir_ot(context, user, pwd, ot, log_callback)
+            self.ruta.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.ruta.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self._entradas, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.ruta)
+            self._sucio = False
+        except Exception:
+            pass
 
-            if log_callback:
-                log_callback("📊 Extrayendo datos del propietario...")
+# ------------------------------------------------------------------------------
+# Sesión de MetroWeb en disco
+# ------------------------------------------------------------------------------
+
+# Cookies de la última sesión iniciada: la corrida siguiente va directo a la OT
+# sin pasar por ingreso.jsp, siempre que usuario y contraseña coincidan con los
+# del login que generó el estado (se guarda sólo una huella PBKDF2, nunca la
+# contraseña). Si el servidor ya la dio de baja, abrir_ot detecta la redirección
+# al login y se vuelve a ingresar.
+# Para no guardar nada en disco: MetroWebSession(ruta_estado_sesion=None) o la
+# variable de entorno EXTRACT_CAMIONES_SIN_SESION_GUARDADA=1.
+RUTA_ESTADO_SESION: Optional[Path] = (
+    None
+    if os.environ.get("EXTRACT_CAMIONES_SIN_SESION_GUARDADA")
+    else Path.home() / ".extract_camiones" / "metroweb_sesion.json"
+)
+VIGENCIA_ESTADO_SESION_HORAS = 8
+_ITERACIONES_HUELLA = 100_000
+
+def huella_credenciales(usuario: str, password: str, sal: bytes) -> str:
+    return hashlib.pbkdf2_hmac(
+        "sha256", f"{usuario}\0{password}".encode("utf-8"), sal, _ITERACIONES_HUELLA
+    ).hex()
+
+def credenciales_coinciden(
+    credenciales: Optional[Dict[str, str]], usuario: str, password: str
+) -> bool:
+    """Compara usuario/contraseña contra {"usuario", "sal", "huella"} de un login previo."""
+    if not credenciales or credenciales.get("usuario") != usuario:
+        return False
+    huella = credenciales.get("huella")
+    if not isinstance(huella, str):
+        return False
+    try:
+        sal = bytes.fromhex(credenciales["sal"])
+    except (KeyError, TypeError, ValueError):
+        return False
+    try:
+        return hmac.compare_digest(huella_credenciales(usuario, password, sal), huella)
+    except TypeError:
+        # compare_digest no acepta str con caracteres fuera de ASCII
+        return False
+
+def nuevas_credenciales(usuario: str, password: str) -> Dict[str, str]:
+    sal = os.urandom(16)
+    return {"usuario": usuario, "sal": sal.hex(), "huella": huella_credenciales(usuario, password, sal)}
+
+def cargar_estado_sesion(
+    ruta: Optional[Path], vigencia_horas: float = VIGENCIA_ESTADO_SESION_HORAS
+) -> Tuple[Optional[Dict[str, str]], Optional[Dict[str, object]]]:
+    """Devuelve (credenciales, storage_state) si hay un estado guardado y vigente."""
+    if ruta is None:
+        return None, None
+    try:
+        data = json.loads(ruta.read_text(encoding="utf-8"))
+        if time.time() - float(data["ts"]) > vigencia_horas * 3600:
+            return None, None
+        credenciales = data["credenciales"]
+        campos_ok = isinstance(credenciales, dict) and all(
+            isinstance(credenciales.get(k), str) for k in ("usuario", "sal", "huella")
+        )
+        if campos_ok and isinstance(data["estado"], dict):
+            return credenciales, data["estado"]
+    except Exception:
+        pass
+    return None, None
 
-            det = leer_detalle_vpe(context)
-            nombre_usuario_det = det.get("nombre_usuario_instr", "").strip()
-            direccion_legal_det = det.get("direccion_legal", "").strip()
+def borrar_estado_sesion(ruta: Optional[Path]) -> None:
+    """Descarta el estado guardado (p. ej. cuando sus cookies ya no sirven)."""
+    if ruta is None:
+        return
+    try:
+        ruta.unlink(missing_ok=True)
+    except OSError:
+        pass
 
-            nro_ot = meta.get("ot", "").strip()
-            vpe_num = meta.get("vpe", "").strip()
-            empresa = meta.get("empresa_solicitante", "").strip()
-            usuario_rep = nombre_usuario_det or meta.get("usuario_representado", "").strip()
+def guardar_estado_sesion(
+    ruta: Optional[Path], credenciales: Dict[str, str], estado: Dict[str, object]
+) -> None:
+    """Escribe el estado sólo legible por el usuario del sistema (0o600)."""
+    if ruta is None:
+        return
+    try:
+        ruta.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        tmp = ruta.with_suffix(".tmp")
+        tmp.unlink(missing_ok=True)
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"ts": time.time(), "credenciales": credenciales, "estado": estado}, f)
+        os.replace(tmp, ruta)
+    except Exception:
+        pass
 
-            if log_callback:
-                log_callback("\n📋 INFORMACIÓN DEL TRÁMITE:")
-                log_callback(f"   • Número de O.T.: {nro_ot}")
-                log_callback(f"   • VPE Nº: {vpe_num}")
-                log_callback(f"   • Empresa: {empresa}")
-                log_callback(f"   • Propietario: {usuario_rep}\n")
+# ------------------------------------------------------------------------------
+# Armado de filas para el Excel
+# ------------------------------------------------------------------------------
 
-            if not instrument_links:
-                if log_callback:
-                    log_callback("⚠️ No se detectaron instrumentos en el VPE")
-                return []
+# Fila vacía con las claves en el orden de exportación
+_FILA_TEMPLATE: Dict[str, str] = dict.fromkeys(COLUMNS_ORDER, "")
 
-            total = len(instrument_links)
-            if log_callback:
-                log_callback(f"🔧 Procesando {total} instrumento(s)...\n")
+def _strip(v: object) -> str:
+    return str(v or "").strip()
 
-            for idx, href in enumerate(instrument_links, start=1):
-                if progress_callback:
-                    progress_callback(idx, total)
+def armar_fila(
+    fila_base: Dict[str, str],
+    inst: Dict[str, object],
+    rec_model: Dict[str, str],
+    ind_model: Dict[str, str],
+) -> Dict[str, str]:
+    """
+    Completa una copia de la fila base de la OT con los datos de un instrumento
+    (lugar de instalación, receptor e indicador).
+    """
+    rec: Dict[str, str] = inst.get("receptor") or {}  # type: ignore[assignment]
+    ind: Dict[str, str] = inst.get("indicador") or {}  # type: ignore[assignment]
+
+    # e = dd=dt (corrección usada en tu script original)
+    dd_dt_rec = _strip(rec_model.get("dd_dt"))
+
+    fila = fila_base.copy()
+    fila.update(
+        {
+            "Lugar propio de instalación - Domicilio": inst.get("inst_dom", ""),  # type: ignore[dict-item]
+            "Lugar propio de instalación - Localidad": inst.get("inst_loc", ""),  # type: ignore[dict-item]
+            "Lugar propio de instalación - Provincia": inst.get("inst_prov", ""),  # type: ignore[dict-item]
+            "Fabricante receptor": _strip(rec_model.get("fabricante")),
+            "Marca Receptor": _strip(rec_model.get("marca")),
+            "Modelo Receptor": _strip(rec_model.get("modelo")),
+            "N° de serie Receptor": _strip(rec.get("serie")),
+            "Cód ap. mod. Receptor": _strip(rec_model.get("codigo_aprobacion") or rec.get("code")),
+            "Origen Receptor": _strip(rec_model.get("origen")),
+            "e": dd_dt_rec,
+            "máx": _strip(rec_model.get("max")),
+            "mín": _strip(rec_model.get("min")),
+            "dd=dt": dd_dt_rec,
+            "clase": _strip(rec_model.get("clase")),
+            "N° de Aprobación Modelo (Receptor)": _strip(rec_model.get("n_aprob")),
+            "Fecha de Aprobación Modelo (Receptor)": _strip(rec_model.get("fecha_aprob")),
+            "Fabricante Indicador": _strip(ind_model.get("fabricante")),
+            "Marca Indicador": _strip(ind_model.get("marca")),
+            "Modelo Indicador": _strip(ind_model.get("modelo")),
+            "N° de serie Indicador": _strip(ind.get("serie")),
+            "Código Aprobación (Indicador)": _strip(ind_model.get("codigo_aprobacion") or ind.get("code")),
+            "Origen Indicador": _strip(ind_model.get("origen")),
+            "N° de Aprobación Modelo (Indicador)": _strip(ind_model.get("n_aprob")),
+            "Fecha de Aprobación Modelo (Indicador)": _strip(ind_model.get("fecha_aprob")),
+        }
+    )
+    return fila
 
+# ------------------------------------------------------------------------------
+# Sesión reutilizable (varias OTs con un único navegador)
+# ------------------------------------------------------------------------------
+
+def _bloquear_recursos(route: Route) -> None:
+    request = route.request
+    if request.resource_type in RECURSOS_BLOQUEADOS or any(
+        host in request.url for host in HOSTS_BLOQUEADOS
+    ):
+        route.abort()
+    else:
+        route.continue_()
+
+class MetroWebSession:
+    """
+    Mantiene vivo un único Chromium/BrowserContext para procesar varias OTs.
+    El navegador se lanza recién en la primera extracción y el login se
+    reutiliza mientras MetroWeb no pida credenciales de nuevo.
+
+    Los objetos sync de Playwright quedan atados al hilo que los creó: usar la
+    sesión siempre desde el mismo hilo y cerrarla con close() (o con "with").
+    """
+
+    def __init__(
+        self,
+        mostrar_navegador: bool = False,
+        requiere_direccion_legal: bool = True,
+        cache_modelos: Optional[CacheModelos] = None,
+        cache_instrumentos: Optional[CacheModelos] = None,
+        ruta_estado_sesion: Optional[Path] = RUTA_ESTADO_SESION,
+    ) -> None:
+        self.mostrar_navegador = mostrar_navegador
+        # None desactiva el guardado de cookies entre corridas
+        self.ruta_estado_sesion = ruta_estado_sesion
+        # Por defecto, cache de modelos en disco compartida entre corridas
+        self.cache_modelos = cache_modelos if cache_modelos is not None else CacheModelos()
+        # La de instrumentos, sólo si se pide explícitamente
+        if cache_instrumentos is None and os.environ.get("EXTRACT_CAMIONES_CACHE_INSTRUMENTOS"):
+            cache_instrumentos = CacheModelos(RUTA_CACHE_INSTRUMENTOS, TTL_CACHE_INSTRUMENTOS_DIAS)
+        self.cache_instrumentos = cache_instrumentos
+        # Si es False y el resumen ya trae el Usuario Representado, se omite
+        # detalle.jsp (una carga de página menos por OT) y el domicilio fiscal queda vacío.
+        self.requiere_direccion_legal = requiere_direccion_legal
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._context: Optional[BrowserContext] = None
+        self._page: Optional[Page] = None
+        # Huella del último login válido: se reutiliza la sesión sólo con las mismas credenciales
+        self._credenciales: Optional[Dict[str, str]] = None
+
+    def __enter__(self) -> "MetroWebSession":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _get_context(self) -> BrowserContext:
+        if self._context is None:
+            self._playwright = sync_playwright().start()
+            self._browser = self._playwright.chromium.launch(
+                headless=not self.mostrar_navegador, slow_mo=0, args=list(ARGS_CHROMIUM)
+            )
+            credenciales, estado = cargar_estado_sesion(self.ruta_estado_sesion)
+            self._context = self._browser.new_context(
+                service_workers="block", storage_state=estado  # type: ignore[arg-type]
+            )
+            self._context.route("**/*", _bloquear_recursos)
+            self._page = None
+            self._credenciales = credenciales
+        return self._context
+
+    def _get_page(self) -> Page:
+        """Pestaña única de la sesión: se reutiliza en todas las OTs y lecturas."""
+        context = self._get_context()
+        if self._page is None or self._page.is_closed():
+            self._page = context.new_page()
+            self._page.set_default_timeout(60_000)
+        return self._page
+
+    def _abrir_ot(
+        self,
+        ot: str,
+        user: str,
+        pwd: str,
+        log_callback: Optional[Callable[[str], None]] = None,
+    ) -> Tuple[Page, Dict[str, str], List[str]]:
+        page = self._get_page()
+        login = not credenciales_coinciden(self._credenciales, user, pwd)
+        try:
+            if login:
+                # Sin las cookies previas: que un login fallido no herede una sesión válida
+                page.context.clear_cookies()
+                iniciar_sesion(page, user, pwd, log_callback)
+            try:
+                meta, instrument_links = abrir_ot(page, ot, log_callback)
+            except Exception:
+                if login:
+                    raise
+                # Se reutilizó la sesión guardada y algo falló (expiró, el portal la
+                # invalidó, ...): un único reintento con login limpio.
+                login = True
+                self._credenciales = None
+                borrar_estado_sesion(self.ruta_estado_sesion)
+                page.context.clear_cookies()
+                iniciar_sesion(page, user, pwd, log_callback)
+                meta, instrument_links = abrir_ot(page, ot, log_callback)
+        except Exception:
+            self._credenciales = None
+            raise
+        if login:
+            # abrir_ot pasó: el portal aceptó estas credenciales
+            self._credenciales = nuevas_credenciales(user, pwd)
+            try:
+                estado = page.context.storage_state()
+            except Exception:
+                estado = None
+            if estado:
+                guardar_estado_sesion(self.ruta_estado_sesion, self._credenciales, estado)  # type: ignore[arg-type]
+        return page, meta, instrument_links
+
+    def extraer(
+        self,
+        ot: str,
+        user: str,
+        pwd: str,
+        log_callback: Optional[Callable[[str], None]] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+    ) -> List[Dict[str, str]]:
+        """
+        Retorna una lista de filas (dict campo->valor) para exportar a Excel.
+        """
+        filas: List[Dict[str, str]] = []
+
+        page, meta, instrument_links = self._abrir_ot(ot, user, pwd, log_callback)
+        context = self._get_context()
+        if log_callback:
+            log_callback("📊 Extrayendo datos del propietario...")
+
+        if meta.get("usuario_representado") and not self.requiere_direccion_legal:
+            det: Dict[str, str] = {}
+        else:
+            det = leer_detalle_vpe(context, page)
+        nombre_usuario_det = det.get("nombre_usuario_instr", "").strip()
+        direccion_legal_det = det.get("direccion_legal", "").strip()
+
+        nro_ot = meta.get("ot", "").strip()
+        vpe_num = meta.get("vpe", "").strip()
+        empresa = meta.get("empresa_solicitante", "").strip()
+        usuario_rep = nombre_usuario_det or meta.get("usuario_representado", "").strip()
+
+        if log_callback:
+            # Un solo mensaje para el bloque: una entrada en la cola del log
+            log_callback(
+                "\n📋 INFORMACIÓN DEL TRÁMITE:\n"
+                f"   • Número de O.T.: {nro_ot}\n"
+                f"   • VPE Nº: {vpe_num}\n"
+                f"   • Empresa: {empresa}\n"
+                f"   • Propietario: {usuario_rep}\n"
+            )
+
+        if not instrument_links:
+            if log_callback:
+                log_callback("⚠️ No se detectaron instrumentos en el VPE")
+            return []
+
+        # Campos comunes a todos los instrumentos de la OT: se arman una sola vez
+        fila_base = _FILA_TEMPLATE.copy()
+        fila_base.update(
+            {
+                "Número de O.T.": nro_ot,
+                "VPE Nº": vpe_num,
+                "Empresa solicitante": empresa,
+                "Razón social (Propietario)": usuario_rep,
+                "Domicilio (Fiscal)": direccion_legal_det,
+                "Instrumento verificado": "Balanza para pesar camiones",
+                "Tipo (Indicador)": "electrónica",
+            }
+        )
+
+        total = len(instrument_links)
+        if log_callback:
+            log_callback(f"🔧 Procesando {total} instrumento(s)...\n")
+
+        ids: List[str] = []
+        for href in instrument_links:
+            m = _ID_INSTRUMENTO_RE.search(href)
+            ids.append(m.group(1) if m else "")
+
+        # 1) Instrumentos: los que no están en cache se descargan de a
+        #    CONCURRENCIA_DESCARGAS en paralelo
+        cache_inst = self.cache_instrumentos
+        instrumentos: List[Dict[str, object]] = []
+        for tanda in _tandas(ids, CONCURRENCIA_DESCARGAS):
+            cacheados = [cache_inst.get(i) if cache_inst and i else None for i in tanda]
+            htmls = descargar_html(
+                page,
+                [url_instrumento(i) if i and c is None else "" for i, c in zip(tanda, cacheados)],
+            )
+            for id_instrumento, cacheado, html in zip(tanda, cacheados, htmls):
+                idx = len(instrumentos) + 1
                 if log_callback:
                     log_callback(f"   [{idx}/{total}] Procesando instrumento...")
 
-                m = re.search(r"idInstrumento=(\d+)", href)
-                id_instrumento = m.group(1) if m else ""
-
-                inst = (
-                    leer_instrumento(context, id_instrumento)
-                    if id_instrumento
-                    else {"inst_dom": "", "inst_loc": "", "inst_prov": "", "receptor": {}, "indicador": {}}
+                if not id_instrumento:
+                    inst = _instrumento_vacio()
+                elif cacheado is not None:
+                    inst = cacheado
+                else:
+                    if not html:
+                        html = pedir_html(context, url_instrumento(id_instrumento), page)
+                    inst = parsear_instrumento(indexar_tds(html))
+                    if _instrumento_sin_datos(inst):
+                        # HTML sin datos útiles: se navega la página como antes
+                        inst = leer_instrumento(context, id_instrumento, page)
+                    if cache_inst and not _instrumento_sin_datos(inst):
+                        cache_inst.set(id_instrumento, inst)  # type: ignore[arg-type]
+                instrumentos.append(inst)
+
+                # El último paso se informa al terminar los modelos (fase 2)
+                if progress_callback and idx < total:
+                    progress_callback(idx, total)
+        if cache_inst:
+            cache_inst.guardar()
+
+        # 2) Modelos: cada modeloDetalle distinto se pide una sola vez
+        hrefs_modelo: List[str] = []
+        for inst in instrumentos:
+            for parte in ("receptor", "indicador"):
+                href = (inst[parte] or {}).get("href", "")  # type: ignore[union-attr]
+                if href and href not in hrefs_modelo:
+                    hrefs_modelo.append(href)
+        modelos: Dict[str, Dict[str, str]] = {}
+        pendientes: List[str] = []
+        for href in hrefs_modelo:
+            en_cache = self.cache_modelos.get(href) if self.cache_modelos else None
+            if en_cache is not None:
+                modelos[href] = en_cache
+            else:
+                pendientes.append(href)
+        if pendientes and log_callback:
+            log_callback(f"📐 Descargando {len(pendientes)} modelo(s)...")
+        for tanda in _tandas(pendientes, CONCURRENCIA_DESCARGAS):
+            for href, html in zip(tanda, descargar_html(page, tanda)):
+                modelo = parsear_modelo(indexar_tds(html or pedir_html(context, href, page)))
+                if _modelo_sin_datos(modelo):
+                    modelo = leer_modelo_detalle(context, href, page)
+                modelos[href] = modelo
+                if self.cache_modelos and not _modelo_sin_datos(modelo):
+                    self.cache_modelos.set(href, modelo)
+        if self.cache_modelos:
+            self.cache_modelos.guardar()
+        if progress_callback:
+            progress_callback(total, total)
+
+        # 3) Filas
+        for inst in instrumentos:
+            rec_href = (inst["receptor"] or {}).get("href", "")  # type: ignore[union-attr]
+            ind_href = (inst["indicador"] or {}).get("href", "")  # type: ignore[union-attr]
+            filas.append(
+                armar_fila(
+                    fila_base,
+                    inst,
+                    modelos.get(rec_href, {}) if rec_href else {},
+                    modelos.get(ind_href, {}) if ind_href else {},
                 )
+            )
 
-                rec = inst["receptor"]  # type: ignore[index]
-                ind = inst["indicador"]  # type: ignore[index]
-
-                rec_model = leer_modelo_detalle(context, rec.get("href", "")) if rec.get("href") else {}
-                ind_model = leer_modelo_detalle(context, ind.get("href", "")) if ind.get("href") else {}
-
-                fab_rec = (rec_model.get("fabricante") or "").strip()
-                marca_rec = (rec_model.get("marca") or "").strip()
-                modelo_rec = (rec_model.get("modelo") or "").strip()
-                serie_rec = (rec.get("serie") or "").strip()
-                codap_rec = (rec_model.get("codigo_aprobacion") or rec.get("code") or "").strip()
-                origen_rec = (rec_model.get("origen") or "").strip()
-
-                # e = dd=dt (corrección usada en tu script original)
-                dd_dt_rec = (rec_model.get("dd_dt") or "").strip()
-                e_rec = dd_dt_rec
-
-                max_rec = (rec_model.get("max") or "").strip()
-                min_rec = (rec_model.get("min") or "").strip()
-                clase_rec = (rec_model.get("clase") or "").strip()
-                naprob_rec = (rec_model.get("n_aprob") or "").strip()
-                faprob_rec = (rec_model.get("fecha_aprob") or "").strip()
-
-                fab_ind = (ind_model.get("fabricante") or "").strip()
-                marca_ind = (ind_model.get("marca") or "").strip()
-                modelo_ind = (ind_model.get("modelo") or "").strip()
-                serie_ind = (ind.get("serie") or "").strip()
-                codap_ind = (ind_model.get("codigo_aprobacion") or ind.get("code") or "").strip()
-                origen_ind = (ind_model.get("origen") or "").strip()
-                naprob_ind = (ind_model.get("n_aprob") or "").strip()
-                faprob_ind = (ind_model.get("fecha_aprob") or "").strip()
-
-                lugar_dom = inst.get("inst_dom", "")  # type: ignore[assignment]
-                lugar_loc = inst.get("inst_loc", "")
-                lugar_prov = inst.get("inst_prov", "")
-
-                fila = {
-                    "Número de O.T.": nro_ot,
-                    "VPE Nº": vpe_num,
-                    "Empresa solicitante": empresa,
-                    "Razón social (Propietario)": usuario_rep,
-                    "Domicilio (Fiscal)": direccion_legal_det,
-                    "Localidad (Fiscal)": "",
-                    "Provincia (Fiscal)": "",
-                    "Lugar propio de instalación - Domicilio": lugar_dom,
-                    "Lugar propio de instalación - Localidad": lugar_loc,
-                    "Lugar propio de instalación - Provincia": lugar_prov,
-                    "Instrumento verificado": "Balanza para pesar camiones",
-                    "Fabricante receptor": fab_rec,
-                    "Marca Receptor": marca_rec,
-                    "Modelo Receptor": modelo_rec,
-                    "N° de serie Receptor": serie_rec,
-                    "Cód ap. mod. Receptor": codap_rec,
-                    "Origen Receptor": origen_rec,
-                    "e": e_rec,
-                    "máx": max_rec,
-                    "mín": min_rec,
-                    "dd=dt": dd_dt_rec,
-                    "clase": clase_rec,
-                    "N° de Aprobación Modelo (Receptor)": naprob_rec,
-                    "Fecha de Aprobación Modelo (Receptor)": faprob_rec,
-                    "Tipo (Indicador)": "electrónica",
-                    "Fabricante Indicador": fab_ind,
-                    "Marca Indicador": marca_ind,
-                    "Modelo Indicador": modelo_ind,
-                    "N° de serie Indicador": serie_ind,
-                    "Código Aprobación (Indicador)": codap_ind,
-                    "Origen Indicador": origen_ind,
-                    "N° de Aprobación Modelo (Indicador)": naprob_ind,
-                    "Fecha de Aprobación Modelo (Indicador)": faprob_ind,
-                }
-
-                filas.append(fila)
+        if log_callback:
+            log_callback(f"\n✅ Se procesaron {len(filas)} instrumento(s) correctamente")
 
-            if log_callback:
-                log_callback(f"\n✅ Se procesaron {len(filas)} instrumento(s) correctamente")
+        return filas
 
-        finally:
-            try:
-                browser.close()
-            except Exception:
-                pass
+    def close(self) -> None:
+        try:
+            if self._browser:
+                self._browser.close()
+        except Exception:
+            pass
+        try:
+            if self._playwright:
+                self._playwright.stop()
+        except Exception:
+            pass
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._page = None
+        self._credenciales = None
+
+# ------------------------------------------------------------------------------
+# Punto principal llamado por la GUI
+# ------------------------------------------------------------------------------
 
-    return filas
+def extraer_camiones_por_ot(
+    ot: str,
+    user: str,
+    pwd: str,
+    mostrar_navegador: bool = False,
+    log_callback: Optional[Callable[[str], None]] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    requiere_direccion_legal: bool = True,
+) -> List[Dict[str, str]]:
+    """
+    Retorna una lista de filas (dict campo->valor) para exportar a Excel.
+    Para varias OTs en la misma corrida conviene usar MetroWebSession.
+    """
+    with MetroWebSession(
+        mostrar_navegador=mostrar_navegador,
+        requiere_direccion_legal=requiere_direccion_legal,
+    ) as sesion:
+        return sesion.extraer(
+            ot,
+            user,
+            pwd,
+            log_callback=log_callback,
+            progress_callback=progress_callback,
+        )
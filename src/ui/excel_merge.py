@@ -7,7 +7,9 @@ from pathlib import Path
 import pandas as pd
 from openpyxl import load_workbook
 from openpyxl.styles import Font, Alignment
-from openpyxl.utils.dataframe import dataframe_to_rows
+
+# Separador "=== INSTRUMENTO N ===" de la hoja de verificación
+_SEPARADOR_RE = re.compile(r"=+\s*INSTRUMENTO\s+(\d+)\s*=+", re.IGNORECASE)
 
 def _is_file_locked(path: Path) -> bool:
     try:
@@ -44,11 +46,11 @@ def _ensure_three_columns(df: pd.DataFrame) -> pd.DataFrame:
     if set(cols) >= {"campo", "valor"}:
         out_rows = []
         current_n = 1
-        sep_pat = re.compile(r"=+\s*INSTRUMENTO\s+(\d+)\s*=+", re.IGNORECASE)
-        for _, row in df.iterrows():
-            campo = str(row.get("Campo", ""))
-            valor = row.get("Valor", "")
-            m = sep_pat.fullmatch(campo.strip())
+        campos = df["Campo"] if "Campo" in df.columns else [""] * len(df)
+        valores = df["Valor"] if "Valor" in df.columns else [""] * len(df)
+        for campo, valor in zip(campos, valores):
+            campo = str(campo)
+            m = _SEPARADOR_RE.fullmatch(campo.strip())
             if m:
                 current_n = int(m.group(1)); continue
             out_rows.append({"Campo": campo, "Valor": valor, "Instrumento N": current_n})
@@ -80,7 +82,7 @@ def append_sheet_as_first(
     for j, h in enumerate(headers, start=1):
         cell = ws.cell(row=1, column=j, value=h)
         cell.font = header_font; cell.alignment = align
-    for i, row in enumerate(dataframe_to_rows(df3, index=False, header=False), start=2):
+    for i, row in enumerate(df3.itertuples(index=False, name=None), start=2):
         for j, val in enumerate(row, start=1):
             c = ws.cell(row=i, column=j, value=val); c.alignment = align
 
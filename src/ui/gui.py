@@ -13,22 +13,25 @@ Ejecución recomendada:
 """
 
 # --- bootstrap robusto del proyecto (permite ejecutar este archivo "a pelo") ---
+import importlib.util
+import io
 import os
 import platform
 import queue
 import re
 import sys
 import threading
+import time
 import subprocess
 import xml.etree.ElementTree as ET
 import zipfile
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Callable, Mapping, Optional, cast
 
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext, ttk
-from openpyxl import load_workbook
 
 
 def find_project_root(markers=("pyproject.toml", "requirements.txt", ".git")) -> Path:
@@ -55,6 +58,10 @@ APP_SUBTITLE = "Extractor de datos (Beta)"
 # Versión tomada automáticamente desde pyproject.toml (src/version.py)
 # Ejemplo: APP_VERSION = "v0.4.0"
 TEMPLATE_CAMION_PATH = ROOT / "assets" / "plantilla_camion.xlsx"
+# Tamaño fijo de la ventana principal
+VENTANA_ANCHO, VENTANA_ALTO = 840, 900
+# Líneas máximas que conserva el área de log (las más viejas se descartan)
+LOG_MAX_LINEAS = 2000
 
 
 # Paleta
@@ -68,53 +75,49 @@ SUCCESS = "#28a745"
 DISABLED = "#BDBDBD"
 
 # ================== Dependencias internas ==================
+# Solo se verifica que estén instaladas: pandas, openpyxl y Playwright se importan
+# recién cuando se usan, para que la ventana aparezca sin esperar esas cargas.
 
 _MISSING_DEPS = []
 
-try:
-    import pandas as pd  # noqa: F401
-except Exception as _e:  # pragma: no cover
-    _MISSING_DEPS.append(f"pandas ({_e})")
-
-try:
-    from src.portal.scraper import extraer_camiones_por_ot
-except Exception as _e:  # pragma: no cover
-    _MISSING_DEPS.append(
-        "src.portal.scraper.extraer_camiones_por_ot (verifica el archivo scraper.py y la firma)"
-    )
-
-try:
-    from src.io.excel_exporter import (
-        DATE_FIELDS,
-        armar_hoja_verificacion_2columnas,
-        exportar_verificacion_2columnas,
-        _fecha_castellano,
-    )
-except Exception as _e:  # pragma: no cover
-    _MISSING_DEPS.append(
-        "src.io.excel_exporter (faltan armar_hoja_verificacion_2columnas y dependencias asociadas)"
-    )
+for _modulo, _descripcion in (
+    ("pandas", "pandas"),
+    ("openpyxl", "openpyxl"),
+    ("playwright", "playwright"),
+    (
+        "src.portal.scraper",
+        "src.portal.scraper.extraer_camiones_por_ot (verifica el archivo scraper.py y la firma)",
+    ),
+    (
+        "src.io.excel_exporter",
+        "src.io.excel_exporter (faltan armar_hoja_verificacion_2columnas y dependencias asociadas)",
+    ),
+    (
+        "src.domain.address",
+        "src.domain.address.parse_domicilio_fiscal (revisa address.py)",
+    ),
+):
+    try:
+        if importlib.util.find_spec(_modulo) is None:
+            _MISSING_DEPS.append(_descripcion)
+    except Exception:  # pragma: no cover
+        _MISSING_DEPS.append(_descripcion)
 
-try:
-    from src.domain.address import parse_domicilio_fiscal  # noqa: F401
-except Exception as _e:
-    _MISSING_DEPS.append(
-        "src.domain.address.parse_domicilio_fiscal (revisa address.py)"
-    )
 
-# Import “a prueba de balas” del helper para anexar hoja "datos vpe"
-append_sheet_as_first = None
-try:
-    from src.ui.excel_merge import (
-        append_sheet_as_first,
-    )  # ejecución como paquete (python -m src.ui.gui)
-except Exception:
+def _cargar_append_sheet_as_first() -> Optional[Callable[..., Path]]:
+    """Import “a prueba de balas” (y diferido) del helper para anexar hoja "datos vpe"."""
     try:
-        from .excel_merge import (
+        from src.ui.excel_merge import (
             append_sheet_as_first,
-        )  # ejecución directa desde src/ui (python gui.py)
+        )  # ejecución como paquete (python -m src.ui.gui)
     except Exception:
-        append_sheet_as_first = None
+        try:
+            from .excel_merge import (  # type: ignore[no-redef]
+                append_sheet_as_first,
+            )  # ejecución directa desde src/ui (python gui.py)
+        except Exception:
+            return None
+    return append_sheet_as_first
 
 
 # ================== Helpers Excel ==================
@@ -149,18 +152,29 @@ def _mapear_hojas(xlsx_path: Path) -> dict[str, str]:
     return mapping
 
 
+@lru_cache(maxsize=4)
+def _leer_plantilla(template_path: Path, mtime_ns: int) -> bytes:
+    return template_path.read_bytes()
+
+
+def _bytes_plantilla(template_path: Path) -> bytes:
+    """Bytes de la plantilla, leídos una vez por sesión (se releen si cambia el archivo)."""
+    return _leer_plantilla(template_path, template_path.stat().st_mtime_ns)
+
+
 def _restaurar_hojas_desde_template(
-    *, template_path: Path, destino: Path, hojas_a_preservar: list[str]
-) -> None:
+    *, template_path: Path, contenido: bytes, hojas_a_preservar: list[str]
+) -> bytes:
     """
-    Reemplaza la(s) hoja(s) solicitada(s) en ``destino`` con el XML de ``template_path``.
+    Reemplaza la(s) hoja(s) solicitada(s) en ``contenido`` (xlsx en memoria) con el XML
+    de ``template_path`` y devuelve el xlsx resultante.
 
     Esto evita que se pierdan elementos no soportados por ``openpyxl`` (encabezado/pie
     con imágenes) tras guardar el archivo.
     """
 
     if not hojas_a_preservar:
-        return
+        return contenido
 
     mapping = _mapear_hojas(template_path)
     archivos_a_reemplazar = set()
@@ -174,35 +188,43 @@ def _restaurar_hojas_desde_template(
         archivos_a_reemplazar.add(rel_path)
 
     if not archivos_a_reemplazar:
-        return
+        return contenido
 
-    tmp_path = destino.with_suffix(".tmp.xlsx")
+    salida = io.BytesIO()
     with (
-        zipfile.ZipFile(destino, "r") as z_out,
-        zipfile.ZipFile(template_path, "r") as z_tpl,
-        zipfile.ZipFile(tmp_path, "w") as z_new,
+        zipfile.ZipFile(io.BytesIO(contenido), "r") as z_out,
+        zipfile.ZipFile(io.BytesIO(_bytes_plantilla(template_path)), "r") as z_tpl,
+        zipfile.ZipFile(salida, "w", compression=zipfile.ZIP_DEFLATED) as z_new,
     ):
-        for nombre in z_out.namelist():
-            if nombre in archivos_a_reemplazar and nombre in z_tpl.namelist():
-                data = z_tpl.read(nombre)
+        en_template = archivos_a_reemplazar.intersection(z_tpl.namelist())
+        for info in z_out.infolist():
+            if info.filename in en_template:
+                data = z_tpl.read(info.filename)
             else:
-                data = z_out.read(nombre)
-            z_new.writestr(nombre, data)
+                data = z_out.read(info.filename)
+            z_new.writestr(info, data, compress_type=zipfile.ZIP_DEFLATED)
 
-    tmp_path.replace(destino)
+    return salida.getvalue()
 
 
 def exportar_excel_detalle_instrumentos(
-    filas: list[dict[str, str]], destino_principal: Path
+    filas: list[dict[str, str]], destino_principal: Path, df=None
 ) -> Path | None:
     """
     Si hay más de un instrumento, genera un segundo Excel con el detalle de todos.
+    ``df`` permite reutilizar la hoja de verificación ya armada para ``filas``.
     Devuelve la ruta creada o None si no corresponde exportar.
     """
     if len(filas) <= 1:
         return None
 
-    df = armar_hoja_verificacion_2columnas(filas)
+    from src.io.excel_exporter import (
+        armar_hoja_verificacion_2columnas,
+        exportar_verificacion_2columnas,
+    )
+
+    if df is None:
+        df = armar_hoja_verificacion_2columnas(filas)
     ruta_detalle = destino_principal.with_name(
         f"{destino_principal.stem}_instrumentos{destino_principal.suffix}"
     )
@@ -212,22 +234,28 @@ def exportar_excel_detalle_instrumentos(
 # ================== Utilidades ==================
 
 
+# Caracteres invalidos en nombres de archivo de Windows -> "_"
+_FNAME_TABLE = str.maketrans({c: "_" for c in '<>:"/\\|?*'})
+
+
+# Patrones de validación de campos, compilados una sola vez
+_OT_RE = re.compile(r"^\d{3}-\d{5}$")
+_FECHA_RE = re.compile(r"^\d{2}/\d{2}/\d{4}$")
+
+
 def limpiar_nombre_archivo(texto: str) -> str:
     """Normaliza un nombre de archivo reemplazando caracteres invalidos."""
-    invalidos = ["<", ">", ":", '"', "/", "\\", "|", "?", "*"]
-    for ch in invalidos:
-        texto = texto.replace(ch, "_")
-    return texto.strip()[:100] or "SIN_NOMBRE"
+    return texto.translate(_FNAME_TABLE).strip()[:100] or "SIN_NOMBRE"
 
 
 def validar_formato_ot(ot: str) -> bool:
     """Valida que la OT siga el patron NNN-NNNNN."""
-    return bool(re.match(r"^\d{3}-\d{5}$", ot))
+    return bool(_OT_RE.match(ot))
 
 
 def validar_fecha_ddmmaaaa(fecha: str) -> bool:
     """Valida fechas en formato dd/mm/aaaa (ej. 16/12/2025)."""
-    if not re.match(r"^\d{2}/\d{2}/\d{4}$", fecha):
+    if not _FECHA_RE.match(fecha):
         return False
     try:
         datetime.strptime(fecha, "%d/%m/%Y")
@@ -236,54 +264,6 @@ def validar_fecha_ddmmaaaa(fecha: str) -> bool:
     return True
 
 
-class ModernButton(tk.Canvas):
-    def __init__(
-        self,
-        parent: tk.Widget,
-        text: str,
-        command: Optional[Callable[[], None]],
-        bg_color: str = SUCCESS,
-        fg_color: str = "white",
-        hover_color: str = "#218838",
-        width: int = 240,
-        height: int = 44,
-    ) -> None:
-        super().__init__(
-            parent, width=width, height=height, highlightthickness=0, bg=parent["bg"]
-        )
-        self._cmd = command
-        self._bg = bg_color
-        self._fg = fg_color
-        self._hover = hover_color
-        self.rect = self.create_rectangle(
-            2, 2, width - 2, height - 2, fill=bg_color, width=0
-        )
-        self.text = self.create_text(
-            width // 2,
-            height // 2,
-            text=text,
-            fill=fg_color,
-            font=("Segoe UI", 10, "bold"),
-        )
-        self.bind("<Enter>", lambda *_: self.itemconfig(self.rect, fill=self._hover))
-        self.bind("<Leave>", lambda *_: self.itemconfig(self.rect, fill=self._bg))
-        self.bind("<Button-1>", lambda *_: self._cmd and self._cmd())
-
-    def set_enabled(self, enabled: bool) -> None:
-        if enabled:
-            self.itemconfig(self.rect, fill=self._bg)
-            self.bind(
-                "<Enter>", lambda *_: self.itemconfig(self.rect, fill=self._hover)
-            )
-            self.bind("<Leave>", lambda *_: self.itemconfig(self.rect, fill=self._bg))
-            self.bind("<Button-1>", lambda *_: self._cmd and self._cmd())
-        else:
-            self.itemconfig(self.rect, fill=DISABLED)
-            self.unbind("<Enter>")
-            self.unbind("<Leave>")
-            self.unbind("<Button-1>")
-
-
 # ================== Ventana principal ==================
 
 
@@ -301,13 +281,15 @@ class ExtractorGUI:
 
         self.root = root
         self.root.title(f"{APP_NAME} – {APP_SUBTITLE} {APP_VERSION}")
-        self.root.geometry("840x900")
+        self.root.geometry(f"{VENTANA_ANCHO}x{VENTANA_ALTO}")
         self.root.resizable(False, False)
         self.root.configure(bg=BG)
 
         # Estado
         self._filas: list[dict[str, str]] = []
+        self._df_export = None  # hoja de verificación de self._filas, armada una sola vez
         self._razon_social: str = ""
+        self._razon_limpia: str = "SIN_RAZON"  # razón social ya apta para nombre de archivo
 
         # TK vars
         self.var_user = tk.StringVar()
@@ -320,6 +302,7 @@ class ExtractorGUI:
         # Widgets
         self.lbl_prog: tk.Label
         self.progress: ttk.Progressbar
+        self.btn_run: ttk.Button
         self.txt_log: scrolledtext.ScrolledText
         self.btn_dev_toggle: ttk.Button
         self.dev_section: tk.Frame | None = None
@@ -328,11 +311,56 @@ class ExtractorGUI:
         self.btn_dev_release: ttk.Button | None = None
         self._dev_card_pack_opts: dict[str, Any] = {}
         self._ui_jobs: queue.Queue[Callable[[], None]] = queue.Queue()
-
+        self._log_queue: queue.Queue[str] = queue.Queue()
+        self._progreso_pendiente: tuple[float, str] | None = None
+        # El worker escribe y el hilo de Tk lee y limpia: siempre bajo este lock
+        self._progreso_lock = threading.Lock()
+        self._last_prog_ts = 0.0
+        self._ultimo_pct = -1
+        self._ultimo_texto_prog = ""
+
+        # Hilo único para MetroWeb: los objetos sync de Playwright quedan atados al
+        # hilo que los creó, así el navegador y el login se reutilizan entre OTs.
+        self._sesion: Any = None
+        self._jobs_scraper: queue.Queue[Callable[[], None] | None] = queue.Queue()
+        self._hilo_scraper = threading.Thread(target=self._worker_scraper, daemon=True)
+        self._hilo_scraper.start()
+
+        self._build_styles()
         self._build()
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
         self.root.after(50, self._drain_ui_jobs)
 
     # ---------- UI construction ----------
+    def _build_styles(self) -> None:
+        # Un único ttk.Style: hover/disabled los resuelve Tk sin callbacks de Python
+        style = ttk.Style()
+        style.theme_use("default")
+        style.configure("TProgressbar", troughcolor="#E6EAF2", background=PRIMARY)
+        style.configure(
+            "Primary.TButton",
+            font=("Segoe UI", 10, "bold"),
+            foreground="white",
+            background=SUCCESS,
+            borderwidth=0,
+            focusthickness=0,
+            padding=(28, 12),
+        )
+        # Borde de 1 px propio del ttk.Entry (sin Frame contenedor por campo)
+        style.configure(
+            "Card.TEntry",
+            padding=(8, 8),
+            fieldbackground="white",
+            relief="solid",
+            borderwidth=1,
+            bordercolor="#ccc",
+        )
+        style.map(
+            "Primary.TButton",
+            background=[("disabled", DISABLED), ("active", "#218838")],
+            foreground=[("disabled", "white")],
+        )
+
     def _build(self) -> None:
         self._build_header()
 
@@ -373,8 +401,11 @@ class ExtractorGUI:
         # Acciones
         btn_zone = tk.Frame(container, bg=BG)
         btn_zone.pack(pady=6)
-        self.btn_run = ModernButton(
-            btn_zone, "🚀 INICIAR EXTRACCIÓN", command=self._start_thread
+        self.btn_run = ttk.Button(
+            btn_zone,
+            text="🚀 INICIAR EXTRACCIÓN",
+            style="Primary.TButton",
+            command=self._start_thread,
         )
         self.btn_run.pack()
 
@@ -388,9 +419,6 @@ class ExtractorGUI:
             top_prog, mode="determinate", length=740, maximum=100
         )
         self.progress.pack(fill="x")
-        style = ttk.Style()
-        style.theme_use("default")
-        style.configure("TProgressbar", troughcolor="#E6EAF2", background=PRIMARY)
 
         info_prog = tk.Frame(card_prog, bg=CARD)
         info_prog.pack(fill="x", padx=14, pady=(0, 8))
@@ -576,19 +604,13 @@ class ExtractorGUI:
         tk.Label(wrap, text=label + ":", bg=CARD, fg="#555").pack(
             anchor="w", pady=(0, 4)
         )
-        border = tk.Frame(
-            wrap, bg="#ccc", highlightbackground="#ccc", highlightthickness=1
-        )
-        border.pack(fill="x")
-        e = tk.Entry(
-            border,
+        ttk.Entry(
+            wrap,
             textvariable=var,
-            bg="white",
-            relief="flat",
+            style="Card.TEntry",
             font=("Segoe UI", 10),
             show=show,
-        )
-        e.pack(fill="x", padx=8, pady=8)
+        ).pack(fill="x")
 
     def _build_fecha_estimada_input(self, parent: tk.Widget) -> None:
         wrap = tk.Frame(parent, bg=CARD)
@@ -603,17 +625,12 @@ class ExtractorGUI:
         row = tk.Frame(wrap, bg=CARD)
         row.pack(fill="x")
 
-        border = tk.Frame(
-            row, bg="#ccc", highlightbackground="#ccc", highlightthickness=1
-        )
-        border.pack(side="left", fill="x", expand=True)
-        tk.Entry(
-            border,
+        ttk.Entry(
+            row,
             textvariable=self.var_fecha_estimada,
-            bg="white",
-            relief="flat",
+            style="Card.TEntry",
             font=("Segoe UI", 10),
-        ).pack(fill="x", padx=8, pady=8)
+        ).pack(side="left", fill="x", expand=True)
 
         ttk.Button(
             row, text="Pegar fecha", command=self._pegar_fecha_desde_clipboard
@@ -636,6 +653,8 @@ class ExtractorGUI:
 
     def _drain_ui_jobs(self) -> None:
         try:
+            self._flush_log()
+            self._flush_progreso()
             while True:
                 job = self._ui_jobs.get_nowait()
                 job()
@@ -649,33 +668,72 @@ class ExtractorGUI:
                 pass
 
     def _log(self, msg: str) -> None:
-        if not self._is_ui_thread():
-            self._run_ui(self._log, msg)
+        # Desde el hilo de trabajo solo se encola: el poller vuelca el lote en la UI
+        ts = datetime.now().strftime("%H:%M:%S")
+        self._log_queue.put(f"[{ts}] {msg}\n")
+        if self._is_ui_thread():
+            self._flush_log()
+            self.root.update_idletasks()
+
+    def _flush_log(self) -> None:
+        lineas: list[str] = []
+        try:
+            while True:
+                lineas.append(self._log_queue.get_nowait())
+        except queue.Empty:
+            pass
+        if not lineas:
             return
 
+        # Un solo insert/see por lote en lugar de uno por mensaje
         self.txt_log.config(state="normal")
-        ts = datetime.now().strftime("%H:%M:%S")
-        self.txt_log.insert("end", f"[{ts}] {msg}\n")
+        self.txt_log.insert("end", "".join(lineas))
+        # Acotar el widget a las últimas LOG_MAX_LINEAS líneas
+        total = int(self.txt_log.index("end-1c").split(".")[0])
+        if total > LOG_MAX_LINEAS:
+            self.txt_log.delete("1.0", f"{total - LOG_MAX_LINEAS + 1}.0")
         self.txt_log.see("end")
         self.txt_log.config(state="disabled")
-        self.root.update_idletasks()
 
     def _set_progress_pct(self, pct: float, label: str) -> None:
         if not self._is_ui_thread():
-            self._run_ui(self._set_progress_pct, pct, label)
+            # Solo importa el último valor: los intermedios se pisan hasta el próximo drenaje
+            with self._progreso_lock:
+                self._progreso_pendiente = (pct, label)
             return
 
-        pct = max(0.0, min(100.0, pct))
-        self.progress["value"] = pct
-        self.lbl_prog.config(text=f"{label} ({pct:.0f}%)")
-        self.root.update_idletasks()
+        with self._progreso_lock:
+            self._progreso_pendiente = None
+        self._aplicar_progreso(pct, label)
+        # Repintado forzado como mucho cada 50 ms (siempre al llegar al 100%)
+        ahora = time.monotonic()
+        if pct >= 100 or ahora - self._last_prog_ts >= 0.05:
+            self._last_prog_ts = ahora
+            self.root.update_idletasks()
+
+    def _flush_progreso(self) -> None:
+        with self._progreso_lock:
+            pendiente, self._progreso_pendiente = self._progreso_pendiente, None
+        if pendiente is not None:
+            self._aplicar_progreso(*pendiente)
+
+    def _aplicar_progreso(self, pct: float, label: str) -> None:
+        # Solo se tocan los widgets si cambia el porcentaje entero o el texto
+        pct_int = round(max(0.0, min(100.0, pct)))
+        if pct_int != self._ultimo_pct:
+            self._ultimo_pct = pct_int
+            self.progress["value"] = pct_int
+        texto = f"{label} ({pct_int}%)"
+        if texto != self._ultimo_texto_prog:
+            self._ultimo_texto_prog = texto
+            self.lbl_prog.config(text=texto)
 
     def _enable_ui(self, enabled: bool) -> None:
         if not self._is_ui_thread():
             self._run_ui(self._enable_ui, enabled)
             return
 
-        self.btn_run.set_enabled(enabled)
+        self.btn_run.state(["!disabled"] if enabled else ["disabled"])
 
     def _pegar_fecha_desde_clipboard(self) -> None:
         try:
@@ -853,9 +911,38 @@ class ExtractorGUI:
         pwd = self.var_pass.get().strip()
         ot = self.var_ot.get().strip()
         headless = self.var_headless.get()
-        threading.Thread(
-            target=self._run, args=(user, pwd, ot, headless), daemon=True
-        ).start()
+        self._jobs_scraper.put(lambda: self._run(user, pwd, ot, headless))
+
+    # ---------- Hilo de MetroWeb ----------
+    def _worker_scraper(self) -> None:
+        while True:
+            job = self._jobs_scraper.get()
+            if job is None:
+                return
+            job()
+
+    def _obtener_sesion(self, headless: bool) -> Any:
+        """Sesión de MetroWeb reutilizable (se recrea si cambia el modo headless)."""
+        from src.portal.scraper import MetroWebSession
+
+        mostrar = not headless
+        if self._sesion is not None and self._sesion.mostrar_navegador != mostrar:
+            self._cerrar_sesion()
+        if self._sesion is None:
+            self._sesion = MetroWebSession(mostrar_navegador=mostrar)
+        return self._sesion
+
+    def _cerrar_sesion(self) -> None:
+        if self._sesion is not None:
+            self._sesion.close()
+            self._sesion = None
+
+    def _on_close(self) -> None:
+        # El cierre del navegador corre en su propio hilo; se espera un momento
+        self._jobs_scraper.put(self._cerrar_sesion)
+        self._jobs_scraper.put(None)
+        self._hilo_scraper.join(timeout=5)
+        self.root.destroy()
 
     def _run(self, user: str, pwd: str, ot: str, headless: bool) -> None:
         try:
@@ -869,11 +956,13 @@ class ExtractorGUI:
                 self._set_progress_pct(pct, f"Extrayendo instrumentos {idx}/{total}")
 
             self._set_progress_pct(10, "Autenticando…")
-            self._filas = extraer_camiones_por_ot(
-                ot=ot,
-                user=user,
-                pwd=pwd,
-                mostrar_navegador=not headless,
+            sesion = self._obtener_sesion(headless)
+
+            self._df_export = None
+            self._filas = sesion.extraer(
+                ot,
+                user,
+                pwd,
                 log_callback=self._log,
                 progress_callback=progress_wrapper,
             )
@@ -892,11 +981,18 @@ class ExtractorGUI:
                 if self._filas
                 else ""
             )
+            self._razon_limpia = (
+                limpiar_nombre_archivo(self._razon_social)
+                if self._razon_social
+                else "SIN_RAZON"
+            )
             self._set_progress_pct(100, "Extracción completa")
             self._log(f"Extracción completa: {len(self._filas)} instrumento(s).")
             self._run_ui(self.root.after, 200, self._save_dialog)
 
         except Exception as e:  # pragma: no cover (UI)
+            # El navegador puede haber quedado en mal estado: la próxima OT arranca uno nuevo
+            self._cerrar_sesion()
             self._log(f"ERROR: {e}")
             self._run_ui(messagebox.showerror, "Error en la extracción", str(e))
         finally:
@@ -905,12 +1001,7 @@ class ExtractorGUI:
     # ---------- Guardado (plantilla con "datos vpe") ----------
     def _save_dialog(self) -> None:
         ot = self.var_ot.get().strip()
-        razon = (
-            limpiar_nombre_archivo(self._razon_social)
-            if self._razon_social
-            else "SIN_RAZON"
-        )
-        sugerido = f"OT_{ot}_{razon}.xlsx"
+        sugerido = f"OT_{ot}_{self._razon_limpia}.xlsx"
 
         path = filedialog.asksaveasfilename(
             title="Guardar Excel",
@@ -929,7 +1020,11 @@ class ExtractorGUI:
             ruta = self._exportar_en_plantilla(Path(path))
             size_kb = ruta.stat().st_size / 1024
             self._log(f"Archivo guardado: {ruta.resolve()} ({size_kb:.2f} KB)")
-            ruta_detalle = exportar_excel_detalle_instrumentos(self._filas, ruta)
+            ruta_detalle = exportar_excel_detalle_instrumentos(
+                self._filas,
+                ruta,
+                df=self._obtener_dataframe_para_exportar() if len(self._filas) > 1 else None,
+            )
             detalle_msg = ""
             if ruta_detalle:
                 detalle_kb = ruta_detalle.stat().st_size / 1024
@@ -966,7 +1061,12 @@ class ExtractorGUI:
                 f"No se encontró la plantilla base en: {template_path.resolve()}"
             )
 
-        wb = load_workbook(template_path)
+        from openpyxl import load_workbook
+
+        from src.io.excel_exporter import DATE_FIELDS, _fecha_castellano
+
+        # Plantilla cacheada en memoria; sin vínculos externos (no se usan)
+        wb = load_workbook(io.BytesIO(_bytes_plantilla(template_path)), keep_links=False)
         if "datos vpe" not in wb.sheetnames:
             raise ValueError("La plantilla no contiene la hoja 'datos vpe'.")
 
@@ -975,10 +1075,17 @@ class ExtractorGUI:
         campo_fecha_estimada = "Fecha estimada de verificación"
         instrumento[campo_fecha_estimada] = self.var_fecha_estimada.get().strip()
 
+        # Lista de etiquetas de la columna A, leída una sola vez (fila i+1 -> campos[i])
+        campos = [
+            None if v is None else str(v)
+            for (v,) in ws.iter_rows(
+                min_row=1, max_row=ws.max_row, max_col=1, values_only=True
+            )
+        ]
+
         def _asegurar_fila_fecha() -> None:
-            for row in ws.iter_rows(min_row=1, max_row=ws.max_row, max_col=1):
-                if row[0].value and str(row[0].value) == campo_fecha_estimada:
-                    return
+            if campo_fecha_estimada in campos:
+                return
 
             style_col1 = None
             style_col2 = None
@@ -995,6 +1102,7 @@ class ExtractorGUI:
                 cell_campo._style = style_col1
             if style_col2:
                 cell_valor._style = style_col2
+            campos.insert(1, campo_fecha_estimada)
 
         _asegurar_fila_fecha()
 
@@ -1003,27 +1111,36 @@ class ExtractorGUI:
             if campo in instrumento:
                 instrumento[campo] = _fecha_castellano(str(instrumento.get(campo, "")))
 
-        for row in ws.iter_rows(min_row=1, max_row=ws.max_row, max_col=1):
-            cell_campo = row[0]
-            campo = cell_campo.value
+        for fila_nro, campo in enumerate(campos, start=1):
             if campo is None:
                 continue
-            valor = instrumento.get(str(campo), "")
+            valor = instrumento.get(campo, "")
             valor_str = "" if valor is None else str(valor)
-            ws.cell(row=cell_campo.row, column=2, value=valor_str)  # type: ignore[arg-type]
+            ws.cell(row=fila_nro, column=2, value=valor_str)  # type: ignore[arg-type]
 
         destino = destino.with_suffix(".xlsx")
         destino.parent.mkdir(parents=True, exist_ok=True)
-        wb.save(destino)
-        _restaurar_hojas_desde_template(
+        # Se guarda y se post-procesa en memoria: el archivo se escribe una sola vez
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        contenido = _restaurar_hojas_desde_template(
             template_path=template_path,
-            destino=destino,
+            contenido=buffer.getvalue(),
             hojas_a_preservar=["Informe"],
         )
+        # Escritura atómica: un corte a mitad no deja un .xlsx truncado
+        tmp = destino.with_suffix(destino.suffix + ".tmp")
+        try:
+            tmp.write_bytes(contenido)
+            os.replace(tmp, destino)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
         return destino
 
     # ---------- Anexar a Excel base (botón) ----------
     def _cmd_agregar_a_excel_base(self) -> None:
+        append_sheet_as_first = _cargar_append_sheet_as_first()
         if append_sheet_as_first is None:
             messagebox.showwarning(
                 "Función no disponible",
@@ -1064,6 +1181,7 @@ class ExtractorGUI:
 
     # ---------- Anexar a Excel base (flujo encadenado) ----------
     def _merge_into_base(self, df) -> None:
+        append_sheet_as_first = _cargar_append_sheet_as_first()
         if append_sheet_as_first is None:
             messagebox.showwarning(
                 "Función no disponible",
@@ -1110,30 +1228,36 @@ class ExtractorGUI:
             raise RuntimeError(
                 "Todavía no hay datos de extracción. Ejecutá la extracción primero."
             )
-        return armar_hoja_verificacion_2columnas(self._filas)
+        if self._df_export is None:
+            from src.io.excel_exporter import armar_hoja_verificacion_2columnas
+
+            self._df_export = armar_hoja_verificacion_2columnas(self._filas)
+        return self._df_export
 
     @staticmethod
     def _open_folder(folder: Path) -> None:  # pragma: no cover (UI)
         if platform.system() == "Windows":
             os.startfile(folder)  # type: ignore[attr-defined]
         elif platform.system() == "Darwin":
-            os.system(f'open "{folder}"')
+            subprocess.Popen(["open", str(folder)])
         else:
-            os.system(f'xdg-open "{folder}"')
+            subprocess.Popen(["xdg-open", str(folder)])
 
 
 # ---------- Entry-point ----------
 def main() -> None:
     """Inicializa la aplicacion Tk y centra la ventana."""
     root = tk.Tk()
+    # Oculta mientras se arman los widgets: un solo layout y una sola geometría
+    root.withdraw()
     app = ExtractorGUI(root)
 
     # Centrar
+    x = (root.winfo_screenwidth() // 2) - (VENTANA_ANCHO // 2)
+    y = (root.winfo_screenheight() // 2) - (VENTANA_ALTO // 2)
+    root.geometry(f"{VENTANA_ANCHO}x{VENTANA_ALTO}+{x}+{y}")
     root.update_idletasks()
-    w, h = root.winfo_width(), root.winfo_height()
-    x = (root.winfo_screenwidth() // 2) - (w // 2)
-    y = (root.winfo_screenheight() // 2) - (h // 2)
-    root.geometry(f"{w}x{h}+{x}+{y}")
+    root.deiconify()
     root.mainloop()
 
 
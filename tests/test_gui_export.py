@@ -1,6 +1,6 @@
 import pandas as pd
 
-from src.ui.gui import exportar_excel_detalle_instrumentos
+from src.ui.gui import exportar_excel_detalle_instrumentos, limpiar_nombre_archivo
 
 
 def test_exportar_excel_detalle_instrumentos_omite_archivo_si_hay_un_instrumento(
@@ -33,3 +33,8 @@ def test_exportar_excel_detalle_instrumentos_crea_archivo_adicional(
 
     df = pd.read_excel(result, sheet_name="Verificación")
     assert "=== INSTRUMENTO 2 ===" in df["Campo"].astype(str).tolist()
+
+
+def test_limpiar_nombre_archivo_reemplaza_invalidos():
+    assert limpiar_nombre_archivo(' A<B>C:"D/E\\F|G?H* ') == "A_B_C__D_E_F_G_H_"
+    assert limpiar_nombre_archivo("   ") == "SIN_NOMBRE"
@@ -1,4 +1,35 @@
-from src.portal.scraper import only_digits, split_domicilio
+import json
+import os
+import stat
+from pathlib import Path
+
+import pytest
+import yaml
+
+from src.domain.models import COLUMNS_ORDER
+from src.portal import scraper
+from src.portal.scraper import (
+    BASE,
+    ETIQUETAS,
+    CacheModelos,
+    MetroWebSession,
+    SesionVencidaError,
+    cargar_estado_sesion,
+    credenciales_coinciden,
+    descargar_html,
+    guardar_estado_sesion,
+    hrefs_absolutos,
+    indexar_tds,
+    nuevas_credenciales,
+    only_digits,
+    url_instrumento,
+    parsear_instrumento,
+    pedir_html,
+    split_domicilio,
+    td_value,
+    td_value_any,
+    td_values,
+)
 
 
 def test_only_digits_extrae_numeros():
@@ -10,3 +41,407 @@ def test_split_domicilio_multilinea():
     assert dom == "Ruta 7 km 35"
     assert loc == "Luján de Cuyo"
     assert prov == "Mendoza"
+
+
+class _PaginaEnlaces:
+    def __init__(self, hrefs):
+        self._hrefs = hrefs
+        self.llamadas = 0
+
+    def eval_on_selector_all(self, selector, script):
+        self.llamadas += 1
+        return list(self._hrefs)
+
+
+def test_hrefs_absolutos_una_sola_llamada_y_prefijo_base():
+    page = _PaginaEnlaces(
+        ["/MetroWeb/modeloDetalle.do?id=1", None, "https://x/modeloDetalle.do?id=2", "/otro"]
+    )
+    hrefs = hrefs_absolutos(page, "a", "modeloDetalle.do")
+    assert page.llamadas == 1
+    assert hrefs == [
+        BASE + "/MetroWeb/modeloDetalle.do?id=1",
+        "https://x/modeloDetalle.do?id=2",
+    ]
+
+
+def test_indexar_tds_resuelve_etiquetas_desde_snapshot():
+    html = """
+    <table>
+      <tr><td>Nro OT</td><td>307-12345</td></tr>
+      <tr><td>Domicilio<td>Ruta 7
+          km 35<br>Luján de Cuyo<br/>Mendoza</td></tr>
+      <tr><td>Nro de serie</td><td>A1</td></tr>
+      <tr><td>Nro de serie</td><td>B2</td></tr>
+    </table>
+    <a href="/MetroWeb/modeloDetalle.do?id=3">modelo</a>
+    """
+    idx = indexar_tds(html)
+    assert td_value(idx, "Nro OT") == "307-12345"
+    assert td_value(idx, "Domicilio", keep_newlines=True) == (
+        "Ruta 7 km 35\nLuján de Cuyo\nMendoza"
+    )
+    assert td_values(idx, "Nro de serie") == ["A1", "B2"]
+    assert hrefs_absolutos(idx, "a", "modeloDetalle.do") == [
+        BASE + "/MetroWeb/modeloDetalle.do?id=3"
+    ]
+
+
+def test_indice_td_normaliza_etiquetas_y_respeta_orden_del_documento():
+    idx = indexar_tds(
+        "<table>"
+        "<tr><td>Código de Aprobación de Modelo</td><td>C-1</td></tr>"
+        "<tr><td>Modelo</td><td>XR-50</td></tr>"
+        "<tr><td>País  de Origen</td><td>Argentina</td></tr>"
+        "</table>"
+    )
+    # Como el XPath contains(): la primera TD que contiene la etiqueta, aunque
+    # más abajo haya una coincidencia exacta
+    assert td_value(idx, "Modelo") == "C-1"
+    assert td_value(idx, "Modelo", nth=1) == "XR-50"
+    assert td_values(idx, "Modelo") == ["C-1", "XR-50"]
+    assert td_value_any(idx, ["Pais de Origen", "Origen"]) == "Argentina"
+    assert td_value(idx, "Codigo de Aprobacion") == "C-1"
+
+
+def test_indexar_tds_cierra_celdas_con_tags_inline_sin_cerrar():
+    # HTML legado de las JSP: el navegador cierra <font>/<p>/<span> al abrir la TD siguiente
+    idx = indexar_tds(
+        "<table>"
+        "<tr><td><font>Marca<td><font>ACME"
+        "<tr><td><p>Modelo Aprobado<td>XR-50"
+        "<tr><td><span>Nro de serie<td><b>S1"
+        "<tr><td><span>Nro de serie<td><b>S2"
+        "</table>"
+    )
+    assert td_value(idx, "Marca") == "ACME"
+    assert td_value(idx, "Modelo Aprobado") == "XR-50"
+    assert td_values(idx, "Nro de serie") == ["S1", "S2"]
+
+
+class _PaginaFetch:
+    def __init__(self, respuestas):
+        self._respuestas = respuestas
+        self.llamadas = []
+
+    def evaluate(self, script, urls):
+        self.llamadas.append(list(urls))
+        return [self._respuestas.get(u) for u in urls]
+
+
+def test_descargar_html_una_llamada_por_tanda_y_vacios_sin_fetch():
+    page = _PaginaFetch({"u1": "<p>1</p>", "u2": None})
+    assert descargar_html(page, ["u1", "", "u2"]) == ["<p>1</p>", "", ""]
+    assert len(page.llamadas) == 1
+    assert descargar_html(page, ["", ""]) == ["", ""]
+    assert len(page.llamadas) == 1
+
+
+def test_parsear_instrumento_receptor_e_indicador():
+    inst = parsear_instrumento(
+        indexar_tds(
+            "<table>"
+            "<tr><td>Domicilio</td><td>Ruta 7 km 35<br>Luján de Cuyo<br>Mendoza</td></tr>"
+            "<tr><td>Código de Aprobación de Modelo</td><td>C-1</td></tr>"
+            "<tr><td>Nro de serie</td><td>A1</td></tr>"
+            "<tr><td>Código de Aprobación de Modelo</td><td>C-2</td></tr>"
+            "<tr><td>Nro de serie</td><td>B2</td></tr>"
+            "</table>"
+            '<a href="/MetroWeb/modeloDetalle.do?id=1">r</a>'
+            '<a href="/MetroWeb/modeloDetalle.do?id=2">i</a>'
+        )
+    )
+    assert inst["inst_loc"] == "Luján de Cuyo"
+    assert inst["receptor"] == {
+        "href": BASE + "/MetroWeb/modeloDetalle.do?id=1",
+        "code": "C-1",
+        "serie": "A1",
+    }
+    assert inst["indicador"]["serie"] == "B2"
+
+
+def test_cache_modelos_persiste_y_vence(workspace_tmp_path):
+    ruta = workspace_tmp_path / "cache" / "modelos.json"
+    cache = CacheModelos(ruta)
+    cache.set("href-1", {"marca": "ACME"})
+    cache.guardar()
+
+    assert CacheModelos(ruta).get("href-1") == {"marca": "ACME"}
+    assert CacheModelos(ruta).get("otro") is None
+    assert CacheModelos(ruta, ttl_dias=-1).get("href-1") is None
+
+
+class _Respuesta:
+    def __init__(self, cuerpo, content_type, ok=True):
+        self.ok = ok
+        self.headers = {"content-type": content_type}
+        self._cuerpo = cuerpo
+
+    def body(self):
+        return self._cuerpo
+
+
+class _ContextoRequest:
+    def __init__(self, respuesta):
+        self.request = self
+        self._respuesta = respuesta
+
+    def get(self, url, timeout=None):
+        return self._respuesta
+
+
+def test_pedir_html_decodifica_charset_y_falla_en_vacio():
+    html = "<td>Provincia</td><td>Neuquén</td>".encode("latin-1")
+    ctx = _ContextoRequest(_Respuesta(html, "text/html; charset=ISO-8859-1"))
+    assert "Neuquén" in pedir_html(ctx, "https://x/instrumentoDetalle.do")
+
+    ctx = _ContextoRequest(_Respuesta(b"error", "text/html", ok=False))
+    assert pedir_html(ctx, "https://x/instrumentoDetalle.do") == ""
+
+
+def test_estado_sesion_se_guarda_con_huella_y_vence(workspace_tmp_path):
+    ruta = workspace_tmp_path / "sesion.json"
+    estado = {"cookies": [{"name": "JSESSIONID", "value": "abc"}], "origins": []}
+    assert cargar_estado_sesion(ruta) == (None, None)
+
+    guardar_estado_sesion(ruta, nuevas_credenciales("usuario1", "clave"), estado)
+    assert "clave" not in ruta.read_text(encoding="utf-8")
+    if os.name == "posix":
+        assert stat.S_IMODE(ruta.stat().st_mode) == 0o600
+
+    credenciales, cargado = cargar_estado_sesion(ruta)
+    assert cargado == estado
+    assert credenciales_coinciden(credenciales, "usuario1", "clave")
+    assert not credenciales_coinciden(credenciales, "usuario1", "otra")
+    assert not credenciales_coinciden(credenciales, "usuario2", "clave")
+    assert cargar_estado_sesion(ruta, vigencia_horas=-1) == (None, None)
+
+    # Campos de tipo inválido: se descarta el archivo en vez de romper la comparación
+    data = json.loads(ruta.read_text(encoding="utf-8"))
+    data["credenciales"]["huella"] = 123
+    ruta.write_text(json.dumps(data), encoding="utf-8")
+    assert cargar_estado_sesion(ruta) == (None, None)
+    assert not credenciales_coinciden(data["credenciales"], "usuario1", "clave")
+    assert not credenciales_coinciden({**credenciales, "huella": "ñ"}, "usuario1", "clave")
+
+
+# Campo de selectors.yaml (página, clave) -> clave de ETIQUETAS
+_ETIQUETAS_YAML = {
+    ("resumen_jsp", "ot"): "resumen.ot",
+    ("resumen_jsp", "vpe_inline"): "resumen.vpe_inline",
+    ("resumen_jsp", "empresa_solicitante"): "resumen.empresa_solicitante",
+    ("resumen_jsp", "usuario_representado"): "resumen.usuario_representado",
+    ("detalle_jsp", "nombre_usuario_instrumento"): "detalle.nombre_usuario_instr",
+    ("detalle_jsp", "direccion_legal"): "detalle.direccion_legal",
+    ("instrumento_detalle_do", "domicilio_instalacion"): "instrumento.domicilio",
+    ("instrumento_detalle_do", "codigo_aprobacion"): "instrumento.codigo_aprobacion",
+    ("instrumento_detalle_do", "nro_serie"): "instrumento.nro_serie",
+    ("modelo_detalle_do", "modelo"): "modelo.modelo",
+    ("modelo_detalle_do", "marca"): "modelo.marca",
+    ("modelo_detalle_do", "fabricante"): "modelo.fabricante",
+    ("modelo_detalle_do", "origen"): "modelo.origen",
+    ("modelo_detalle_do", "n_aprob"): "modelo.n_aprob",
+    ("modelo_detalle_do", "fecha_aprob"): "modelo.fecha_aprob",
+    ("modelo_detalle_do", "tipo_instrumento"): "modelo.tipo_instr",
+    ("modelo_detalle_do", "max"): "modelo.max",
+    ("modelo_detalle_do", "min"): "modelo.min",
+    ("modelo_detalle_do", "e"): "modelo.e",
+    ("modelo_detalle_do", "dd_dt"): "modelo.dd_dt",
+    ("modelo_detalle_do", "clase"): "modelo.clase",
+    ("modelo_detalle_do", "codigo_aprobacion"): "modelo.codigo_aprobacion",
+}
+
+
+def test_etiquetas_coinciden_con_selectors_yaml():
+    ruta = Path(__file__).resolve().parents[1] / "selectors.yaml"
+    paginas = yaml.safe_load(ruta.read_text(encoding="utf-8"))["pages"]
+    en_yaml = {
+        (pagina, campo): tuple(variantes)
+        for pagina, campos in paginas.items()
+        for campo, variantes in campos.items()
+        if isinstance(variantes, list)
+    }
+    assert set(en_yaml) == set(_ETIQUETAS_YAML)
+    assert set(ETIQUETAS) == set(_ETIQUETAS_YAML.values())
+    for clave_yaml, clave in _ETIQUETAS_YAML.items():
+        assert ETIQUETAS[clave] == en_yaml[clave_yaml], clave
+
+
+# ------------------------------------------------------------------------------
+# MetroWebSession con página/contexto falsos (sin Chromium)
+# ------------------------------------------------------------------------------
+
+def _url_modelo(n):
+    return BASE + f"/MetroWeb/modeloDetalle.do?id={n}"
+
+
+def _html_instrumento(serie, modelo_rec, modelo_ind):
+    return (
+        "<table>"
+        "<tr><td>Domicilio</td><td>Ruta 7 km 35<br>Luján de Cuyo<br>Mendoza</td></tr>"
+        f"<tr><td>Nro de serie</td><td>{serie}-R</td></tr>"
+        f"<tr><td>Nro de serie</td><td>{serie}-I</td></tr>"
+        "</table>"
+        f'<a href="/MetroWeb/modeloDetalle.do?id={modelo_rec}">r</a>'
+        f'<a href="/MetroWeb/modeloDetalle.do?id={modelo_ind}">i</a>'
+    )
+
+
+def _html_modelo(marca):
+    return f"<table><tr><td>Marca</td><td>{marca}</td></tr></table>"
+
+
+class _ContextoSesion:
+    def __init__(self, respuestas_request=None):
+        self.request = self
+        self._respuestas = respuestas_request or {}
+        self.gets = []
+        self.cookies_borradas = 0
+
+    def get(self, url, timeout=None):
+        self.gets.append(url)
+        html = self._respuestas.get(url, "")
+        return _Respuesta(html.encode("utf-8"), "text/html; charset=utf-8", ok=bool(html))
+
+    def clear_cookies(self):
+        self.cookies_borradas += 1
+
+    def storage_state(self):
+        return {"cookies": [], "origins": []}
+
+
+class _PaginaSesion:
+    def __init__(self, contexto, respuestas):
+        self.context = contexto
+        self._respuestas = respuestas
+        self.fetches = []
+
+    def is_closed(self):
+        return False
+
+    def evaluate(self, script, arg):
+        if isinstance(arg, str):
+            # Normalización de pedir_html: el HTML de prueba ya está bien formado
+            return arg
+        self.fetches.extend(u for u in arg if u)
+        return [self._respuestas.get(u, "") for u in arg]
+
+
+def _sesion_falsa(monkeypatch, respuestas, respuestas_request=None, **kwargs):
+    """Sesión con contexto/página falsos; login y búsqueda de la OT quedan registrados."""
+    kwargs.setdefault("cache_modelos", CacheModelos(None))
+    sesion = MetroWebSession(
+        requiere_direccion_legal=False, ruta_estado_sesion=kwargs.pop("ruta", None), **kwargs
+    )
+    contexto = _ContextoSesion(respuestas_request)
+    sesion._context = contexto
+    sesion._page = _PaginaSesion(contexto, respuestas)
+    llamadas = {"login": 0, "abrir_ot": 0, "navegadas": []}
+
+    def iniciar_sesion(page, usuario, password, log_callback=None):
+        llamadas["login"] += 1
+
+    def abrir_ot(page, ot, log_callback=None):
+        llamadas["abrir_ot"] += 1
+        fallo = llamadas.get("fallo_abrir_ot")
+        if fallo is not None and llamadas["abrir_ot"] == 1:
+            raise fallo
+        meta = {"ot": ot, "vpe": "99", "usuario_representado": "ACME SA"}
+        return meta, [url_instrumento("1"), url_instrumento("2")]
+
+    def leer_instrumento(context, id_instrumento, page=None):
+        llamadas["navegadas"].append(url_instrumento(id_instrumento))
+        return parsear_instrumento(indexar_tds(""))
+
+    def leer_modelo_detalle(context, href, page=None):
+        llamadas["navegadas"].append(href)
+        return scraper.parsear_modelo(indexar_tds(""))
+
+    monkeypatch.setattr(scraper, "iniciar_sesion", iniciar_sesion)
+    monkeypatch.setattr(scraper, "abrir_ot", abrir_ot)
+    monkeypatch.setattr(scraper, "leer_instrumento", leer_instrumento)
+    monkeypatch.setattr(scraper, "leer_modelo_detalle", leer_modelo_detalle)
+    return sesion, llamadas
+
+
+_RESPUESTAS = {
+    url_instrumento("1"): _html_instrumento("S1", 10, 20),
+    url_instrumento("2"): _html_instrumento("S2", 10, 20),
+    _url_modelo(10): _html_modelo("ACME"),
+    _url_modelo(20): _html_modelo("INDI"),
+}
+
+
+def test_extraer_modelos_repetidos_una_vez_y_filas_en_orden_de_columnas(monkeypatch):
+    sesion, llamadas = _sesion_falsa(monkeypatch, _RESPUESTAS)
+    progreso = []
+
+    def progress_callback(idx, total):
+        # (paso, total, URLs ya descargadas)
+        progreso.append((idx, total, len(sesion._page.fetches)))
+
+    filas = sesion.extraer("307-1", "u", "p", progress_callback=progress_callback)
+
+    assert llamadas["login"] == 1
+    assert sorted(sesion._page.fetches) == sorted(_RESPUESTAS)
+    assert [list(f) for f in filas] == [COLUMNS_ORDER, COLUMNS_ORDER]
+    assert [f["N° de serie Receptor"] for f in filas] == ["S1-R", "S2-R"]
+    assert {f["Marca Receptor"] for f in filas} == {"ACME"}
+    assert {f["Marca Indicador"] for f in filas} == {"INDI"}
+    # El 100% llega recién con los modelos descargados
+    assert progreso == [(1, 2, 2), (2, 2, 4)]
+    assert llamadas["navegadas"] == []
+
+
+def test_extraer_instrumento_en_cache_no_se_descarga(monkeypatch):
+    cache_inst = CacheModelos(None)
+    cache_inst.set("1", parsear_instrumento(indexar_tds(_RESPUESTAS[url_instrumento("1")])))
+    sesion, _ = _sesion_falsa(monkeypatch, _RESPUESTAS, cache_instrumentos=cache_inst)
+    sesion.extraer("307-1", "u", "p")
+
+    assert url_instrumento("1") not in sesion._page.fetches
+    assert url_instrumento("2") in sesion._page.fetches
+    assert cache_inst.get("2") is not None
+
+
+def test_extraer_fetch_vacio_usa_request_y_luego_navegacion(monkeypatch):
+    # Ningún instrumento sale por fetch; el 1 responde al GET directo y el 2 a nada
+    respuestas = {k: v for k, v in _RESPUESTAS.items() if "instrumentoDetalle" not in k}
+    sesion, llamadas = _sesion_falsa(
+        monkeypatch, respuestas, {url_instrumento("1"): _RESPUESTAS[url_instrumento("1")]}
+    )
+    filas = sesion.extraer("307-1", "u", "p")
+
+    assert sesion._context.gets == [url_instrumento("1"), url_instrumento("2")]
+    assert llamadas["navegadas"] == [url_instrumento("2")]
+    assert filas[0]["N° de serie Receptor"] == "S1-R"
+
+
+def test_abrir_ot_con_otra_contrasena_vuelve_a_ingresar(monkeypatch):
+    sesion, llamadas = _sesion_falsa(monkeypatch, _RESPUESTAS)
+    sesion._credenciales = nuevas_credenciales("u", "vieja")
+    sesion.extraer("307-1", "u", "nueva")
+
+    assert llamadas["login"] == 1
+    assert sesion._context.cookies_borradas == 1
+    assert credenciales_coinciden(sesion._credenciales, "u", "nueva")
+
+
+@pytest.mark.parametrize("fallo", [SesionVencidaError("expiró"), RuntimeError("sin VPE")])
+def test_abrir_ot_con_sesion_guardada_reintenta_un_login(
+    monkeypatch, workspace_tmp_path, fallo
+):
+    ruta = workspace_tmp_path / "sesion.json"
+    credenciales = nuevas_credenciales("u", "p")
+    estado_viejo = {"cookies": [{"name": "viejo"}], "origins": []}
+    guardar_estado_sesion(ruta, credenciales, estado_viejo)
+    sesion, llamadas = _sesion_falsa(monkeypatch, _RESPUESTAS, ruta=ruta)
+    sesion._credenciales = credenciales
+    llamadas["fallo_abrir_ot"] = fallo
+    sesion.extraer("307-1", "u", "p")
+
+    assert llamadas["login"] == 1
+    assert llamadas["abrir_ot"] == 2
+    assert sesion._context.cookies_borradas == 1
+    # El estado viejo se reemplaza por el del login nuevo
+    assert cargar_estado_sesion(ruta)[1] == {"cookies": [], "origins": []}